@@ -0,0 +1,139 @@
+"""Upload size and OCR latency with and without image pre-processing.
+
+Every image is OCR'd twice against an OCR.space-compatible endpoint: once as
+received and once through fir_core.imageprep (orient, downscale, grayscale or
+binarise, tile, recompress). The report shows bytes before and after, the
+time of each preparation stage and both OCR latencies. By default a stand-in
+server runs in-process with a simulated round trip and uplink, so the effect
+of smaller uploads shows without network access.
+
+    python benchmarks/bench_imageprep.py                        # synthetic phone photos
+    python benchmarks/bench_imageprep.py --corpus scans/ --mode binary
+    python benchmarks/bench_imageprep.py --url http://127.0.0.1:8765/parse/image --json out.json
+
+Needs Pillow.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import synthetic  # noqa: E402
+from fir_core.imageprep import prepare_image  # noqa: E402
+from fir_core.ocr import OcrClient, OcrSpaceBackend, StandInOcrServer  # noqa: E402
+
+IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+
+def load_corpus(corpus, count, seed):
+    """[(name, bytes)] from a directory, or synthetic photos (every third one three pages tall)"""
+    if corpus:
+        paths = sorted(p for p in Path(corpus).rglob('*') if p.suffix.lower() in IMAGE_SUFFIXES)
+        return [(p.name, p.read_bytes()) for p in paths[:count or None]]
+    return [(f"scan{i}.jpg", synthetic.make_scan_jpeg(pages=3 if i % 3 == 2 else 1, seed=seed + i))
+            for i in range(count or 6)]
+
+
+def measure(images, url, mode, concurrency):
+    client = OcrClient(OcrSpaceBackend(url=url, timeout=120, pool_size=concurrency),
+                       max_concurrency=concurrency)
+    rows = []
+    try:
+        for name, data in images:
+            start = time.perf_counter()
+            client.ocr(name, data)
+            raw_ms = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            tiles, report = prepare_image(data, name, mode=mode)
+            prep_ms = (time.perf_counter() - start) * 1000
+            start = time.perf_counter()
+            for _, result in client.map(tiles):
+                if isinstance(result, Exception):
+                    raise result
+            ocr_ms = (time.perf_counter() - start) * 1000
+
+            report.update({'name': name, 'raw_ocr_ms': raw_ms, 'prep_ms': prep_ms,
+                           'prepared_ocr_ms': ocr_ms, 'prepared_total_ms': prep_ms + ocr_ms})
+            rows.append(report)
+    finally:
+        client.shutdown()
+    return rows
+
+
+def summarize(rows):
+    bytes_in = sum(r['bytes_in'] for r in rows)
+    bytes_out = sum(r['bytes_out'] for r in rows)
+    stages = {}
+    for row in rows:
+        for stage, ms in row['stages_ms'].items():
+            stages.setdefault(stage, []).append(ms)
+    return {
+        'images': len(rows),
+        'bytes_in': bytes_in,
+        'bytes_out': bytes_out,
+        'reduction': 1 - bytes_out / bytes_in if bytes_in else 0.0,
+        'stage_median_ms': {stage: statistics.median(values) for stage, values in stages.items()},
+        'raw_ocr_median_ms': statistics.median(r['raw_ocr_ms'] for r in rows),
+        'prepared_total_median_ms': statistics.median(r['prepared_total_ms'] for r in rows),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark image pre-processing before OCR.")
+    parser.add_argument('--corpus', help="directory of .jpg/.png scans (default: synthetic phone photos)")
+    parser.add_argument('-n', '--count', type=int, default=0, help="images to use (default: all, or 6 synthetic)")
+    parser.add_argument('--mode', choices=('gray', 'binary'), default='gray')
+    parser.add_argument('--url', help="OCR endpoint (default: an in-process stand-in server)")
+    parser.add_argument('--latency', type=float, default=300, help="stand-in round trip in ms")
+    parser.add_argument('--bandwidth', type=float, default=1024, help="stand-in upload speed in KB/s")
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help="parallel OCR calls for tiles")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the per-image rows and summary here")
+    args = parser.parse_args(argv)
+
+    images = load_corpus(args.corpus, args.count, args.seed)
+    if not images:
+        parser.error("no images found")
+
+    server = None
+    url = args.url
+    if url is None:
+        server = StandInOcrServer(('127.0.0.1', 0), latency=args.latency / 1000,
+                                  bandwidth=args.bandwidth * 1024)
+        server.start()
+        url = server.url
+    try:
+        rows = measure(images, url, args.mode, args.concurrency)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+    print(f"{'image':<14} {'in KB':>8} {'out KB':>8} {'tiles':>5} {'prep ms':>8} {'raw OCR ms':>11} {'prep+OCR ms':>12}")
+    for r in rows:
+        print(f"{r['name']:<14} {r['bytes_in'] / 1024:>8.0f} {r['bytes_out'] / 1024:>8.0f} {r['tiles']:>5} "
+              f"{r['prep_ms']:>8.0f} {r['raw_ocr_ms']:>11.0f} {r['prepared_total_ms']:>12.0f}")
+
+    summary = summarize(rows)
+    print(f"\n{summary['images']} images: {summary['bytes_in'] / 2**20:.1f} MB -> "
+          f"{summary['bytes_out'] / 2**20:.1f} MB ({summary['reduction']:.0%} smaller)")
+    print("median stage ms: " + ", ".join(f"{stage} {ms:.1f}" for stage, ms in summary['stage_median_ms'].items()))
+    print(f"median OCR latency: {summary['raw_ocr_median_ms']:.0f} ms as received, "
+          f"{summary['prepared_total_median_ms']:.0f} ms prepared (incl. preparation)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump({'rows': rows, 'summary': summary}, fh, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
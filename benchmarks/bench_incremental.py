@@ -0,0 +1,120 @@
+"""Per-edit latency of full re-analysis against incremental analysis.
+
+Simulates someone editing a FIR: each step types a few characters at the end
+or in the middle of the narrative, or changes a form field. After every edit
+the FIR is analysed twice, with analyze_fir_logic from scratch and with one
+IncrementalAnalysis kept across edits, and the two results are compared.
+
+    python benchmarks/bench_incremental.py
+    python benchmarks/bench_incremental.py --pages 10 --sections 5000 --edits 500
+    python benchmarks/bench_incremental.py --fuzzy --json out.json
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import synthetic  # noqa: E402
+from fir_core import IncrementalAnalysis, SectionIndex, analyze_fir_logic  # noqa: E402
+
+TYPED = ('the accused ', 'section 302 ', 'u/s 420, ', 'murder ', 'theft. ', '376 IPC ', 'and ', 'x')
+
+
+def edits(text, count, seed):
+    """Yield (kind, text, form_data) after each simulated edit"""
+    rng = random.Random(seed)
+    form_data = {'complainantName': 'R. Kumar', 'incidentLocation': 'Delhi',
+                 'incidentDate': '2024-01-01', 'accusedName': 'Unknown'}
+    for _ in range(count):
+        roll = rng.random()
+        if roll < 0.5:
+            kind = 'type_end'
+            text += rng.choice(TYPED)
+        elif roll < 0.8:
+            kind = 'type_middle'
+            pos = rng.randrange(len(text) + 1)
+            text = text[:pos] + rng.choice(TYPED) + text[pos:]
+        elif roll < 0.9:
+            kind = 'delete'
+            pos = rng.randrange(len(text) + 1)
+            text = text[:pos] + text[pos + rng.randrange(1, 20):]
+        else:
+            kind = 'form_field'
+            form_data = dict(form_data, accusedName=rng.choice(('Unknown', 'S. Rao', 'two men, kidnapping')))
+        yield kind, text, dict(form_data, incidentDescription=text)
+
+
+def same(a, b):
+    return ([(m['section'], m['score']) for m in a['ipcSections']] ==
+            [(m['section'], m['score']) for m in b['ipcSections']]
+            and (a['severity'], a['priority']) == (b['severity'], b['priority']))
+
+
+def run(pages, sections, count, fuzzy, seed):
+    index = SectionIndex(synthetic.ipc_dataframe(sections, seed=seed))
+    text = synthetic.make_fir(pages=pages, citation_density=0.01, n_sections=sections, seed=seed)
+    live = IncrementalAnalysis(index, fuzzy)
+    live.update(text)
+
+    rows = []
+    for kind, text, form_data in edits(text, count, seed):
+        start = time.perf_counter()
+        expected = analyze_fir_logic(text, form_data, index=index, fuzzy=fuzzy)
+        full_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        results = live.update(text, form_data)
+        incremental_ms = (time.perf_counter() - start) * 1000
+
+        rows.append({'kind': kind, 'full_ms': full_ms, 'incremental_ms': incremental_ms,
+                     'rescanned': live.matcher.segments_rescanned, 'same': same(expected, results)})
+    return rows
+
+
+def summarize(rows):
+    summary = {}
+    for kind in sorted({r['kind'] for r in rows}) + ['all']:
+        subset = [r for r in rows if kind in ('all', r['kind'])]
+        full = statistics.median(r['full_ms'] for r in subset)
+        incremental = statistics.median(r['incremental_ms'] for r in subset)
+        summary[kind] = {'edits': len(subset), 'full_median_ms': full, 'incremental_median_ms': incremental,
+                         'speedup': full / incremental if incremental else 0.0,
+                         'rescanned_median': statistics.median(r['rescanned'] for r in subset)}
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark incremental analysis of an edited FIR.")
+    parser.add_argument('--pages', type=float, default=2, help="FIR length in pages of ~3000 characters")
+    parser.add_argument('--sections', type=int, default=5000, help="synthetic dataset size")
+    parser.add_argument('--edits', type=int, default=200)
+    parser.add_argument('--fuzzy', action='store_true', help="OCR-tolerant matching")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', help="also write the per-edit rows and summary here")
+    args = parser.parse_args(argv)
+
+    rows = run(args.pages, args.sections, args.edits, args.fuzzy, args.seed)
+    summary = summarize(rows)
+
+    print(f"{'edit':<12} {'count':>6} {'full ms':>9} {'incr ms':>9} {'speedup':>8} {'segments':>9}")
+    for kind, s in summary.items():
+        print(f"{kind:<12} {s['edits']:>6} {s['full_median_ms']:>9.2f} {s['incremental_median_ms']:>9.3f} "
+              f"{s['speedup']:>7.0f}x {s['rescanned_median']:>9.0f}")
+    mismatches = sum(not r['same'] for r in rows)
+    print(f"\n{mismatches} of {len(rows)} edits gave different results")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump({'rows': rows, 'summary': summary}, fh, indent=2)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
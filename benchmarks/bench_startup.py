@@ -0,0 +1,106 @@
+"""Cold-start benchmark for the headless (batch/service) path.
+
+Each measurement runs in a fresh interpreter so nothing is cached in-process:
+
+  import           python -c "import fir_core"
+  first analysis   import + load the section index + analyse one FIR
+
+It also reports which heavy modules each step pulled in; importing fir_core
+must not load streamlit, pandas, requests or pypdf.
+
+    python benchmarks/bench_startup.py --dataset path/to/fir-ipc_dataset.csv
+    python benchmarks/bench_startup.py --max-import-ms 100 --max-first-ms 300 --json out.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('streamlit', 'pandas', 'numpy', 'requests', 'pypdf')
+
+SAMPLE_FIR = "The accused committed murder of the victim u/s 302 IPC and fled with stolen jewellery."
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import fir_core
+imported = time.perf_counter()
+if {analyze}:
+    fir_core.analyze_fir_logic({text!r}, index=fir_core.get_section_index({dataset!r}))
+done = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "total_ms": (done - start) * 1000,
+    "heavy": [m for m in {heavy!r} if m in sys.modules],
+}}))
+'''
+
+
+def probe(analyze, dataset):
+    code = _PROBE.format(analyze=analyze, text=SAMPLE_FIR, dataset=dataset, heavy=HEAVY_MODULES)
+    # Interpreter start-up is included in wall time, so time inside the probe instead
+    out = subprocess.run([sys.executable, '-c', code], cwd=REPO_ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def measure(repeat, dataset):
+    if dataset:
+        # Make sure the artifact exists, so we time the steady-state cold start
+        probe(True, dataset)
+
+    import_runs = [probe(False, dataset) for _ in range(repeat)]
+    results = {
+        'import_ms': statistics.median(r['import_ms'] for r in import_runs),
+        'import_heavy_modules': import_runs[0]['heavy'],
+    }
+    if dataset:
+        first_runs = [probe(True, dataset) for _ in range(repeat)]
+        results['first_analysis_ms'] = statistics.median(r['total_ms'] for r in first_runs)
+        results['first_analysis_heavy_modules'] = first_runs[0]['heavy']
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dataset', default=os.environ.get('FIR_IPC_DATASET'),
+                        help="IPC dataset CSV (default: $FIR_IPC_DATASET); needed for time-to-first-analysis")
+    parser.add_argument('-n', '--repeat', type=int, default=7)
+    parser.add_argument('--max-import-ms', type=float, help="fail if the median import time is above this")
+    parser.add_argument('--max-first-ms', type=float, help="fail if time-to-first-analysis is above this")
+    parser.add_argument('--json', help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    results = measure(args.repeat, args.dataset)
+    print(f"import fir_core:        {results['import_ms']:8.1f} ms  "
+          f"heavy modules: {results['import_heavy_modules'] or 'none'}")
+    if 'first_analysis_ms' in results:
+        print(f"time to first analysis: {results['first_analysis_ms']:8.1f} ms  "
+              f"heavy modules: {results['first_analysis_heavy_modules'] or 'none'}")
+    else:
+        print("time to first analysis: skipped (no --dataset / $FIR_IPC_DATASET)")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as fh:
+            json.dump(results, fh, indent=2)
+
+    failures = []
+    if results['import_heavy_modules']:
+        failures.append(f"importing fir_core loaded {results['import_heavy_modules']}")
+    if args.max_import_ms is not None and results['import_ms'] > args.max_import_ms:
+        failures.append(f"import took {results['import_ms']:.1f} ms > {args.max_import_ms} ms")
+    if (args.max_first_ms is not None and 'first_analysis_ms' in results
+            and results['first_analysis_ms'] > args.max_first_ms):
+        failures.append(f"first analysis took {results['first_analysis_ms']:.1f} ms > {args.max_first_ms} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Timing and memory benchmarks for matching, classification, PDF extraction
+and end-to-end analysis across dataset and document sizes.
+
+    python benchmarks/bench_suite.py --quick
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json --threshold 0.25
+    python benchmarks/bench_suite.py --filter matching --no-memory
+
+With --baseline, every case whose median time or tracemalloc peak memory
+grew by more than the threshold (a fraction, 0.25 = 25%) is reported and the
+exit status is 1.
+Compare results from the same machine only.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from functools import lru_cache, partial
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import synthetic  # noqa: E402
+from fir_core import SectionIndex, analyze_fir_logic, classify_sections, find_matching_sections  # noqa: E402
+from fir_core.pdf import iter_pdf_pages, pypdf_available  # noqa: E402
+
+FULL_MATRIX = {
+    'sections': (500, 5000, 50000),
+    'pages': (0.1, 10, 200),
+    'citations': (0.002, 0.02),
+    'noise': (0.0, 0.05),
+    'pdf_pages': (10, 50, 200),
+}
+
+QUICK_MATRIX = {
+    'sections': (500, 5000),
+    'pages': (0.1, 10),
+    'citations': (0.02,),
+    'noise': (0.0, 0.05),
+    'pdf_pages': (10,),
+}
+
+# Peak memory growth below this is not reported, however large the ratio
+MIN_MEMORY_GROWTH_KB = 64
+
+
+def time_call(fn, min_time=0.2, max_runs=50):
+    """Run fn until min_time has passed (at least 3 runs); return per-run seconds"""
+    runs = []
+    deadline = time.perf_counter() + min_time
+    while len(runs) < 3 or (time.perf_counter() < deadline and len(runs) < max_runs):
+        start = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - start)
+    return runs
+
+
+def peak_memory_kb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def count_pages(data, processes):
+    return sum(1 for _ in iter_pdf_pages(data, processes=processes))
+
+
+def iter_cases(matrix, seed):
+    """Yield (name, setup) for every benchmark case in the matrix.
+
+    setup() builds the case's inputs and returns the callable to time, so
+    cases skipped by --filter cost nothing. Inputs shared between cases are
+    built once.
+    """
+    dataframe = lru_cache(maxsize=None)(lambda n: synthetic.ipc_dataframe(n, seed))
+    index = lru_cache(maxsize=None)(lambda n: SectionIndex(dataframe(n)))
+    fir = lru_cache(maxsize=None)(lambda key: synthetic.make_fir(*key, seed=seed))
+
+    fir_keys = [(pages, cites, noise) for pages in matrix['pages']
+                for cites in matrix['citations'] for noise in matrix['noise']]
+    for n in matrix['sections']:
+        yield f"index_build[sections={n}]", lambda n=n: partial(SectionIndex, dataframe(n))
+
+    for n in matrix['sections']:
+        for key in fir_keys:
+            pages, cites, noise = key
+            params = f"sections={n},pages={pages},cites={cites},noise={noise}"
+            yield (f"matching[{params}]",
+                   lambda n=n, k=key: partial(find_matching_sections, fir(k), None, index(n)))
+            if noise:
+                yield (f"fuzzy_matching[{params}]",
+                       lambda n=n, k=key: partial(find_matching_sections, fir(k), None, index(n), fuzzy=True))
+
+        # Classification only depends on the matched sections, so use the
+        # document that matches the most
+        key = (matrix['pages'][-1], matrix['citations'][-1], 0.0)
+        yield (f"classification[sections={n}]",
+               lambda n=n, k=key: partial(classify_sections, find_matching_sections(fir(k), None, index(n))))
+
+        for pages in matrix['pages']:
+            key = (pages, matrix['citations'][-1], 0.0)
+            yield (f"end_to_end[sections={n},pages={pages}]",
+                   lambda n=n, k=key: partial(analyze_fir_logic, fir(k), index=index(n)))
+
+    try:
+        from fir_core.ranking import SectionRanker
+    except ImportError:
+        print("numpy/scipy not installed; skipping ranking benchmarks", file=sys.stderr)
+    else:
+        for n in matrix['sections']:
+            for scheme in ('bm25', 'tfidf'):
+                yield (f"ranker_build[sections={n},{scheme}]",
+                       lambda n=n, s=scheme: partial(SectionRanker, index(n), s))
+                yield (f"ranking_batch[sections={n},{scheme},firs={len(fir_keys)}]",
+                       lambda n=n, s=scheme: partial(SectionRanker(index(n), s).rank_batch,
+                                                     [fir(k) for k in fir_keys]))
+
+    if not pypdf_available():
+        print("pypdf not installed; skipping PDF extraction benchmarks", file=sys.stderr)
+        return
+    pdf = lru_cache(maxsize=None)(lambda pages: synthetic.make_fir_pdf(pages, seed=seed, citation_density=0.01))
+    for pages in matrix['pdf_pages']:
+        for mode, processes in (('threads', False), ('processes', True)):
+            yield (f"pdf_extraction[pages={pages},{mode}]",
+                   lambda p=pages, pr=processes: partial(count_pages, pdf(p), pr))
+
+
+def run(matrix, seed=0, name_filter=None, memory=True, min_time=0.2):
+    results = {}
+    for name, setup in iter_cases(matrix, seed):
+        if name_filter and name_filter not in name:
+            continue
+        fn = setup()
+        runs = time_call(fn, min_time=min_time)
+        row = {'median_s': statistics.median(runs), 'min_s': min(runs), 'runs': len(runs)}
+        if memory:
+            row['peak_kb'] = peak_memory_kb(fn)
+        results[name] = row
+        mem = f"{row['peak_kb']:10.0f} KB" if memory else ""
+        print(f"{name:70s} {row['median_s'] * 1000:10.3f} ms {mem}", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return (name, metric, old, new, ratio) for every case whose median time
+    or peak memory grew by more than threshold"""
+    regressions = []
+    for name, row in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        if old['median_s'] and row['median_s'] / old['median_s'] > 1 + threshold:
+            regressions.append((name, 'time', old['median_s'], row['median_s'],
+                                row['median_s'] / old['median_s']))
+        # Peak memory is only compared when both runs measured it; tiny
+        # absolute changes are allocator noise, not regressions
+        old_kb, new_kb = old.get('peak_kb'), row.get('peak_kb')
+        if (old_kb and new_kb is not None and new_kb - old_kb > MIN_MEMORY_GROWTH_KB
+                and new_kb / old_kb > 1 + threshold):
+            regressions.append((name, 'memory', old_kb, new_kb, new_kb / old_kb))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="FIR analysis benchmark suite.")
+    parser.add_argument('--quick', action='store_true', help="smaller matrix for a fast check")
+    parser.add_argument('--filter', help="only run cases whose name contains this")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-time', type=float, default=0.2, help="seconds spent timing each case")
+    parser.add_argument('--no-memory', action='store_true', help="skip tracemalloc peak measurements")
+    parser.add_argument('--save', help="write results to this JSON file")
+    parser.add_argument('--baseline', help="compare against results saved with --save")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed time or memory growth vs baseline")
+    args = parser.parse_args(argv)
+
+    matrix = QUICK_MATRIX if args.quick else FULL_MATRIX
+    results = run(matrix, seed=args.seed, name_filter=args.filter, memory=not args.no_memory,
+                  min_time=args.min_time)
+
+    if args.save:
+        payload = {
+            'meta': {
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpus': os.cpu_count(),
+                'seed': args.seed,
+                'timestamp': time.time(),
+            },
+            'results': results,
+        }
+        with open(args.save, 'w', encoding='utf-8') as fh:
+            json.dump(payload, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as fh:
+            baseline = json.load(fh)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new, ratio in regressions:
+            if metric == 'time':
+                change = f"{old * 1000:.3f} ms -> {new * 1000:.3f} ms"
+            else:
+                change = f"peak {old:.0f} KB -> {new:.0f} KB"
+            print(f"REGRESSION {name}: {change} ({ratio:.2f}x)", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+"""Load generator for fir_service.py.
+
+Each connection thread sends synthetic FIRs over a keep-alive connection and
+records latency and status codes; 429/503 answers are counted, not retried,
+so the output shows how much load the service sheds.
+
+    python fir_service.py --port 8080 &
+    python benchmarks/load_service.py --url http://127.0.0.1:8080 -n 2000 -c 32
+    python benchmarks/load_service.py --spawn --dataset ipc.csv -n 1000 -c 64 --batch 8
+"""
+
+import argparse
+import http.client
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from benchmarks import synthetic  # noqa: E402
+from fir_core.metrics import LatencyRegistry  # noqa: E402
+
+
+def make_bodies(count, batch, pages, citation_density, seed):
+    """Pre-encode request bodies so the generator itself stays cheap"""
+    firs = [synthetic.make_fir(pages, citation_density, seed=seed + i) for i in range(count)]
+    if batch <= 1:
+        return '/analyze', [json.dumps({'text': text}).encode() for text in firs]
+    bodies = []
+    for i in range(0, count, batch):
+        group = firs[i:i + batch]
+        bodies.append(json.dumps({'firs': [{'id': i + j, 'text': t} for j, t in enumerate(group)]}).encode())
+    return '/analyze/batch', bodies
+
+
+def run_load(url, requests_total=1000, concurrency=16, batch=1, pages=0.5, citation_density=0.01,
+             seed=0, timeout=60.0):
+    """Fire requests_total requests from `concurrency` connections; return stats"""
+    parts = urlsplit(url)
+    path, bodies = make_bodies(min(requests_total, 200) * batch, batch, pages, citation_density, seed)
+    registry = LatencyRegistry(window=requests_total)
+    statuses = Counter()
+    lock = threading.Lock()
+    counter = iter(range(requests_total))
+
+    def connection():
+        conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=timeout)
+        try:
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                body = bodies[i % len(bodies)]
+                start = time.perf_counter()
+                try:
+                    conn.request('POST', path, body, {'Content-Type': 'application/json'})
+                    response = conn.getresponse()
+                    response.read()
+                    status = response.status
+                except (OSError, http.client.HTTPException):
+                    status = 'error'
+                    conn.close()
+                elapsed = time.perf_counter() - start
+                with lock:
+                    statuses[status] += 1
+                registry.observe('ok' if status == 200 else 'rejected', elapsed)
+        finally:
+            conn.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(connection) for _ in range(concurrency)]:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    summary = registry.summary()
+    ok = statuses.get(200, 0)
+    return {
+        'requests': requests_total,
+        'firs_per_request': batch,
+        'elapsed': elapsed,
+        'statuses': dict(statuses),
+        'throughput': requests_total / elapsed if elapsed else 0.0,
+        'firs_per_sec': ok * batch / elapsed if elapsed else 0.0,
+        'latency_ok': summary.get('ok', {}),
+        'latency_rejected': summary.get('rejected', {}),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test the FIR analysis service.")
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('-n', '--requests', type=int, default=1000)
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help="parallel connections")
+    parser.add_argument('--batch', type=int, default=1, help="FIRs per request (uses /analyze/batch when > 1)")
+    parser.add_argument('--pages', type=float, default=0.5, help="size of each synthetic FIR")
+    parser.add_argument('--citations', type=float, default=0.01, help="citation density")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--spawn', action='store_true', help="start a service in this process first")
+    parser.add_argument('--dataset', help="IPC dataset for --spawn")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="workers for --spawn")
+    parser.add_argument('--max-queue', type=int, default=512, help="admission bound (queued + running FIRs) for --spawn")
+    parser.add_argument('--json', action='store_true', help="print the stats as JSON")
+    args = parser.parse_args(argv)
+
+    service = server = None
+    url = args.url
+    if args.spawn:
+        from fir_service import AnalysisServer, AnalysisService
+
+        service = AnalysisService(args.dataset, workers=args.workers, max_queue=args.max_queue).start()
+        server = AnalysisServer(('127.0.0.1', 0), service)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        url = server.url
+
+    try:
+        stats = run_load(url, args.requests, args.concurrency, args.batch, args.pages,
+                         args.citations, args.seed)
+    finally:
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+            service.close()
+
+    if args.json:
+        print(json.dumps(stats, indent=2))
+        return 0
+    print(f"{stats['requests']} requests x {stats['firs_per_request']} FIRs in {stats['elapsed']:.2f}s "
+          f"- {stats['throughput']:.1f} req/s, {stats['firs_per_sec']:.1f} FIRs/sec")
+    print("status codes: " + ", ".join(f"{code}={n}" for code, n in sorted(stats['statuses'].items(), key=str)))
+    for label in ('ok', 'rejected'):
+        row = stats[f'latency_{label}']
+        if row:
+            print(f"{label:8s} latency p50 {row['p50'] * 1000:.1f} ms, p95 {row['p95'] * 1000:.1f} ms, "
+                  f"p99 {row['p99'] * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+"""Synthetic IPC tables, FIR narratives and PDFs for benchmarking.
+
+Everything is generated from a seed, so the same arguments always give the
+same corpus and timings stay comparable across runs and machines.
+"""
+
+import csv
+import random
+
+# Real anchors, so classification paths (severity, priority, boosts) are exercised
+ANCHOR_SECTIONS = [
+    ('302', 'Punishment for murder', 'Whoever commits murder shall be punished with death, or imprisonment for life, and shall also be liable to fine.'),
+    ('376', 'Punishment for rape', 'Whoever commits rape shall be punished with rigorous imprisonment of either description.'),
+    ('395', 'Punishment for dacoity', 'Whoever commits dacoity shall be punished with imprisonment for life.'),
+    ('363', 'Punishment for kidnapping', 'Whoever kidnaps any person from India or from lawful guardianship shall be punished.'),
+    ('392', 'Punishment for robbery', 'Whoever commits robbery shall be punished with rigorous imprisonment.'),
+    ('379', 'Punishment for theft', 'Whoever commits theft shall be punished with imprisonment of either description.'),
+    ('420', 'Cheating and dishonestly inducing delivery of property', 'Whoever cheats and thereby dishonestly induces the person deceived to deliver any property (fraud).'),
+    ('323', 'Punishment for voluntarily causing hurt', 'Whoever voluntarily causes hurt shall be punished with imprisonment.'),
+    ('465', 'Punishment for forgery', 'Whoever commits forgery shall be punished with imprisonment.'),
+]
+
+LEGAL_WORDS = (
+    "assault abetment affray breach confinement conspiracy counterfeit criminal cruelty "
+    "defamation dishonest dowry dwelling extortion forgery fraudulent grievous harbouring "
+    "hurt intimidation kidnapping mischief negligence obscene poison property public "
+    "receiving restraint rioting robbery sedition stolen trespass trust unlawful weapon "
+    "wrongful dacoity impersonation bribery perjury escape custody servant assembly "
+    "explosive arson document seal coin stamp weights measures marriage bigamy adultery"
+).split()
+
+NARRATIVE_WORDS = (
+    "the complainant stated that on the night of incident accused persons entered house "
+    "and threatened family members with knife took away gold ornaments cash mobile phone "
+    "neighbours gathered after hearing cries police were informed next morning victim was "
+    "taken to hospital where doctors examined injuries witnesses saw two men fleeing on "
+    "motorcycle towards highway complainant requests action against accused"
+).split()
+
+PAGE_CHARS = 3000
+
+# Typical OCR confusions, applied at random to simulate scanned documents
+OCR_CONFUSIONS = {'o': '0', 'l': '1', 'i': 'l', 's': '5', 'e': 'c', 'a': 'o', '0': 'O', '1': 'l', '5': 'S'}
+
+
+def make_ipc_rows(n_sections, seed=0):
+    """Return n_sections rows of (Section, Title, Description)"""
+    rng = random.Random(seed)
+    rows = list(ANCHOR_SECTIONS[:n_sections])
+    used = {section for section, _, _ in rows}
+    number = 1
+    while len(rows) < n_sections:
+        number += 1
+        section = str(number)
+        if rng.random() < 0.15:
+            section += rng.choice('ABCDE')
+        if section in used:
+            continue
+        used.add(section)
+        title_words = rng.sample(LEGAL_WORDS, rng.randint(1, 4))
+        title = "Punishment for " + " ".join(title_words)
+        description = ("Whoever commits " + " ".join(rng.sample(LEGAL_WORDS, rng.randint(8, 20)))
+                       + " shall be punished with imprisonment which may extend to "
+                       + f"{rng.randint(1, 14)} years, or with fine, or with both.")
+        rows.append((section, title, description))
+    return rows
+
+
+def write_ipc_csv(path, n_sections, seed=0):
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        writer = csv.writer(fh)
+        writer.writerow(['Section', 'Title', 'Description'])
+        writer.writerows(make_ipc_rows(n_sections, seed))
+    return path
+
+
+def ipc_dataframe(n_sections, seed=0):
+    import pandas as pd
+
+    return pd.DataFrame(make_ipc_rows(n_sections, seed), columns=['Section', 'Title', 'Description'])
+
+
+def add_ocr_noise(text, rate, rng):
+    """Swap a fraction `rate` of characters for typical OCR confusions"""
+    if not rate:
+        return text
+    chars = list(text)
+    for i, ch in enumerate(chars):
+        if rng.random() < rate:
+            chars[i] = OCR_CONFUSIONS.get(ch, ch)
+    return "".join(chars)
+
+
+def make_fir(pages=0.1, citation_density=0.01, noise=0.0, n_sections=500, seed=0):
+    """A FIR narrative of roughly `pages` pages (0.1 ~ one paragraph).
+
+    citation_density is the fraction of words that are a citation such as
+    "u/s 302" or "420 IPC"; noise is the OCR character error rate.
+    """
+    rng = random.Random(seed)
+    target = max(200, int(pages * PAGE_CHARS))
+    citable = [section for section, _, _ in make_ipc_rows(min(n_sections, 200), seed)]
+    words = []
+    size = 0
+    while size < target:
+        roll = rng.random()
+        if roll < citation_density:
+            section = rng.choice(citable)
+            word = rng.choice((f"u/s {section}", f"{section} IPC", f"Section {section}",
+                               f"under section {section}"))
+        elif roll < citation_density + 0.05:
+            word = rng.choice(LEGAL_WORDS)
+        else:
+            word = rng.choice(NARRATIVE_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    return add_ocr_noise(" ".join(words), noise, rng)
+
+
+def make_pdf(page_texts):
+    """A minimal text PDF (Helvetica, one page per string) for extraction benchmarks"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for i, text in enumerate(page_texts):
+        page_id = 4 + 2 * i
+        kids.append(f"{page_id} 0 R")
+        lines = []
+        y = 800
+        for line in _wrap(text, 95)[:55]:
+            escaped = line.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+            lines.append(f"BT /F1 9 Tf 30 {y} Td ({escaped}) Tj ET")
+            y -= 14
+        stream = "\n".join(lines).encode('latin-1', 'replace')
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>".encode())
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>".encode()
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def make_fir_pdf(pages, seed=0, **kwargs):
+    rng = random.Random(seed)
+    return make_pdf([make_fir(pages=1, seed=rng.randrange(1 << 30), **kwargs) for _ in range(pages)])
+
+
+def make_scan_jpeg(pages=1, width=3024, seed=0, rotated=True, quality=92):
+    """A phone-photo-like FIR scan: colour JPEG with sensor noise, a paper
+    tint and, with rotated=True, pixels stored sideways behind an EXIF
+    orientation tag. pages > 1 stacks pages into one tall image. Needs Pillow.
+    """
+    import io
+    from PIL import Image, ImageDraw, ImageFont
+
+    rng = random.Random(seed)
+    page_height = width * 4 // 3
+    image = Image.new('RGB', (width, page_height * pages), (236, 230, 214))
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=width // 60)
+    margin, line_height = width // 12, width // 40
+    for page in range(pages):
+        text = make_fir(pages=1, seed=rng.randrange(1 << 30))
+        y = page * page_height + margin
+        for line in _wrap(text, 70):
+            if y > (page + 1) * page_height - margin:
+                break
+            draw.text((margin, y), line, fill=(30, 30, 40), font=font)
+            y += line_height
+
+    # Sensor noise is what makes real photos so large once compressed
+    noise = Image.effect_noise(image.size, 24).convert('RGB')
+    image = Image.blend(image, noise, 0.12)
+
+    exif = Image.Exif()
+    if rotated:
+        image = image.transpose(Image.Transpose.ROTATE_90)
+        exif[0x0112] = 6  # Orientation: rotate 90 CW to display
+    buffer = io.BytesIO()
+    image.save(buffer, 'JPEG', quality=quality, exif=exif.tobytes())
+    return buffer.getvalue()
+
+
+def _wrap(text, width):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
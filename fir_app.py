@@ -1,11 +1,17 @@
 import streamlit as st
-import time
 import json
 from datetime import datetime
-try:
-    from pypdf import PdfReader
-except ImportError:
-    PdfReader = None
+
+from fir_core import (IncrementalAnalysis, SectionIndex, SectionMatcher, analyze_fir_logic, dataset_path, load_index,
+                      merge_results)
+from fir_core import metrics as fir_metrics
+from fir_core.cache import content_key, get_cache
+from fir_core.dedup import minhash
+from fir_core.extraction import extract_many
+from fir_core.metrics import StageTimer, timed
+from fir_core.ocr import ocr_space_file
+from fir_core.pdf import iter_pdf_chunks, pypdf_available
+from fir_core.store import get_store
 
 # Set page configuration
 st.set_page_config(
@@ -57,257 +63,348 @@ st.markdown("""
 # LOGIC & DATA
 # -----------------------------------------------------------------------------
 
-import pandas as pd
-import re
+# Dataset location: $FIR_IPC_DATASET, else the user provided path
+IPC_DATASET_PATH = dataset_path()
 
-# Load IPC Dataset
-@st.cache_data
-def load_ipc_data():
+# PDF extraction needs pypdf; checked without importing it
+PDF_SUPPORT = pypdf_available()
+
+# Load the section index from the compiled artifact (compiling it on first use
+# or when the CSV changes); cache_resource shares the same object across
+# reruns instead of copying it like cache_data does
+@st.cache_resource
+def load_section_index(csv_path=IPC_DATASET_PATH):
     try:
-        # User provided path
-        csv_path = r"c:\Users\ANANTHAKRISHNAN V L\OneDrive\Desktop\Ananthan\fir-ipc_dataset.csv"
-        df = pd.read_csv(csv_path)
-        # Ensure columns exist, handle potential casing issues
-        df.columns = [c.strip() for c in df.columns]
-        return df
+        return load_index(csv_path)
     except Exception as e:
         st.error(f"Failed to load IPC Dataset: {e}")
-        return pd.DataFrame() # Return empty if failed
+        return SectionIndex([]) # Empty index if failed
 
-# Initialize Dataset
-ipc_df = load_ipc_data()
+# Stage timings for this script run, shown in the debug panel
+request_timer = StageTimer()
 
-import requests
+# Extracted text and analysis results, shared by every session in the process
+result_cache = get_cache()
 
-def ocr_space_file(uploaded_file, api_key='helloworld', language='eng'):
-    """OCR.space API request with uploaded file"""
-    try:
-        # Prepare payload
-        payload = {
-            'isOverlayRequired': False,
-            'apikey': api_key,
-            'language': language,
-            'OCREngine': 2 # Use Engine 2 for better handwriting/text support
-        }
-        
-        # Get bytes from uploaded file
-        # Streamlit UploadedFile behaves like a file object
-        files = {'file': (uploaded_file.name, uploaded_file.getvalue())}
-        
-        r = requests.post('https://api.ocr.space/parse/image',
-                          files=files,
-                          data=payload,
-                          timeout=15)
-        
-        result = r.json()
-        
-        # Parse result
-        if result.get('IsErroredOnProcessing'):
-            return f"Error: {result.get('ErrorMessage')}"
-            
-        parsed_results = result.get('ParsedResults')
-        if parsed_results:
-            return parsed_results[0].get('ParsedText')
-        else:
-            return ""
-            
-    except Exception as e:
-        return f"API Connection Error: {e}"
+# Submitted FIRs go to the local SQLite store ($FIR_STORE_PATH) for the dashboard
+try:
+    fir_store = get_store()
+except Exception as e:
+    fir_store = None
+    st.warning(f"FIR store unavailable, submissions will not be saved: {e}")
 
-# Helper to find sections
+# Initialize Dataset
+with request_timer.stage('dataset_load'):
+    ipc_index = load_section_index()
+
+
+
+
+def analysis_key(text, form_data=None, fuzzy=False):
+    return content_key('analysis', ipc_index.fingerprint, text,
+                       json.dumps(form_data, sort_keys=True, default=str) if form_data else None,
+                       'fuzzy' if fuzzy else None)
+
+
+def analyze_fir_cached(text, form_data=None, timer=None, fuzzy=False):
+    """analyze_fir_logic, memoised on the FIR text, form data, dataset and mode"""
+    return result_cache.get_or_compute(
+        analysis_key(text, form_data, fuzzy),
+        lambda: analyze_fir_logic(text, form_data, index=ipc_index, timer=timer, fuzzy=fuzzy))
+
+
+def analyze_fir_flagging(text, timer=None, fuzzy=False):
+    """analyze_fir_cached, plus the stored FIR this text most resembles.
+
+    A near-duplicate (a re-typed copy, a scan of the same report) is only
+    pointed out: the text itself is always analysed, since a small edit such
+    as an added citation can change the result. Returns (results, duplicate);
+    duplicate is (fir_id, similarity), or None.
+    """
+    results = analyze_fir_cached(text, timer=timer, fuzzy=fuzzy)
+    if fir_store is None:
+        return results, None
+    with timed(timer, 'dedup'):
+        duplicates = fir_store.find_duplicates(minhash(text), limit=1)
+    return results, duplicates[0] if duplicates else None
+
+
+def live_analysis(draft, text, form_data=None, fuzzy=False):
+    """Results for a FIR that is still being written, as of this rerun.
+
+    Every session keeps an IncrementalAnalysis per draft ('analyze', 'form'),
+    so the rerun after an edit only rescans the lines and fields that changed.
+    """
+    key = f"live_analysis_{draft}"
+    live = st.session_state.get(key)
+    if live is None or live.index is not ipc_index or live.fuzzy != fuzzy:
+        live = st.session_state[key] = IncrementalAnalysis(ipc_index, fuzzy)
+    with request_timer.stage('live_analysis'):
+        return live.update(text, form_data)
+
+
+def render_live_suggestions(results):
+    """One line of sections suggested for the text so far"""
+    sections = results['ipcSections']
+    if sections:
+        st.caption("💡 Suggested sections so far: " +
+                   ", ".join(f"**{s['section']}** ({s['title']})" for s in sections))
+    else:
+        st.caption("💡 No sections suggested yet")
+
+
+def render_analysis_results(results):
+    """Full results view for the Analyze tab"""
+    st.divider()
+    st.subheader("📊 Analysis Results")
+
+    # Metrics Row
+    m1, m2, m3, m4 = st.columns(4)
+    with m1:
+        color = "red" if results['severity'] == "High" else "orange" if results['severity'] == "Medium" else "green"
+        st.markdown(f"**Severity**")
+        st.markdown(f"<h2 style='color: {color}; margin:0'>{results['severity']}</h2>", unsafe_allow_html=True)
+    with m2:
+        st.metric("Priority Level", results['priority'])
+    with m3:
+        st.metric("Crimes Detected", len(results['crimeTypes']))
+    with m4:
+        st.metric("Model Accuracy", results['accuracy'])
+
+    # Detected Crimes
+    st.markdown("### Detected Crime Types")
+    crimes_html = "".join([f"<span class='crime-tag'>{c}</span>" for c in results['crimeTypes']])
+    st.markdown(crimes_html, unsafe_allow_html=True)
+
+    # IPC Sections
+    st.markdown("### 📜 Applicable IPC Sections")
+    for section in results['ipcSections']:
+        with st.expander(f"IPC Section {section['section']} - {section['description']}", expanded=True):
+            st.write(f"**Punishment:** {section['punishment']}")
+
+    # Suggestions
+    st.markdown("### 🕵️ Investigation Suggestions")
+    for suggestion in results['suggestions']:
+        st.markdown(f"- {suggestion}")
+
+
+def render_form_results(results):
+    """Condensed results view shown after submitting the FIR form"""
+    st.success("FIR Submitted Successfully!")
+
+    # Show minimal results here or copy the analysis view
+    st.divider()
+    st.subheader("Initial Analysis")
+
+    r1, r2 = st.columns(2)
+    with r1:
+        st.info(f"**Detected Crime Classification:** {', '.join(results['crimeTypes'])}")
+    with r2:
+        st.metric("Confidence Score", results['accuracy'])
+
+    st.warning(f"**Recommended Severity:** {results['severity']}")
+
+    st.markdown("**Applicable IPC Sections:**")
+    for s in results['ipcSections']:
+        st.write(f"- **Section {s['section']}**: {s['description']}")
+
+
+def render_document_results(results):
+    """Compact results for one document of a case bundle"""
+    r1, r2, r3 = st.columns(3)
+    r1.metric("Severity", results['severity'])
+    r2.metric("Priority", results['priority'])
+    r3.metric("Sections", len(results['ipcSections']))
+    if results['ipcSections']:
+        st.markdown("\n".join(f"- **Section {s['section']}**: {s['title']}" for s in results['ipcSections']))
+
+
+def render_case_results(case, done, total):
+    """Case-level view merged from the documents analysed so far"""
+    st.markdown(f"### 🗂️ Case Summary ({done} of {total} documents analysed)")
+    m1, m2, m3 = st.columns(3)
+    m1.metric("Severity", case['severity'])
+    m2.metric("Priority Level", case['priority'])
+    m3.metric("Sections", len(case['ipcSections']))
+
+    crimes_html = "".join([f"<span class='crime-tag'>{c}</span>" for c in case['crimeTypes']])
+    st.markdown(crimes_html, unsafe_allow_html=True)
+    for section in case['ipcSections']:
+        cited_in = ", ".join(case['documents'][str(section['section'])])
+        st.write(f"- **Section {section['section']}** - {section['title']} _(in {cited_in})_")
+
+
+def render_case_bundle(uploaded_files, fuzzy=False):
+    """Extract and analyse several uploads at once.
+
+    Extraction runs concurrently (fir_core.extraction); each document's
+    results render as soon as it is done and the case summary above them
+    grows with every document, so the wait is the slowest file, not the sum.
+    """
+    st.divider()
+    st.subheader(f"📁 Case Bundle: {len(uploaded_files)} documents")
+    summary = st.empty()
+    summary.info("Extracting documents...")
+
+    labels = [f"{i + 1}. {uploaded.name}" for i, uploaded in enumerate(uploaded_files)]
+    slots = []
+    for label in labels:
+        box = st.container(border=True)
+        box.markdown(f"**{label}**")
+        slots.append((box.empty(), box.container()))
+
+    # Documents extracted before come straight from the cache
+    keys, cached, to_extract = [], [], []
+    with request_timer.stage('upload_read'):
+        for position, uploaded in enumerate(uploaded_files):
+            data = uploaded.getvalue()
+            keys.append(content_key('extract', uploaded.type, data))
+            text = result_cache.get(keys[position])
+            if text is None:
+                to_extract.append((position, (uploaded.name, uploaded.type, data)))
+                slots[position][0].progress(0.0, text="Queued")
+            else:
+                cached.append((position, 'done', text))
+
+    def events():
+        yield from cached
+        for i, event, value in extract_many([document for _, document in to_extract]):
+            yield to_extract[i][0], event, value
+
+    analysed = {}
+    for position, event, value in events():
+        status, body = slots[position]
+        if event == 'progress':
+            done, total = value
+            status.progress(done / total, text=f"Page {done} of {total}")
+            continue
+        if event == 'error':
+            status.error(f"Could not read this document: {value}")
+            continue
+        if not value.strip():
+            status.warning("No text found. Please ensure the scan is clear.")
+            continue
+
+        result_cache.set(keys[position], value)
+        results, duplicate = analyze_fir_flagging(value, timer=request_timer, fuzzy=fuzzy)
+        note = f"; similar to FIR #{duplicate[0]} ({duplicate[1]:.0%})" if duplicate is not None else ""
+        status.success(f"{len(value):,} characters extracted{note}")
+        with body:
+            render_document_results(results)
+        analysed[labels[position]] = results
+        with summary.container():
+            render_case_results(merge_results(analysed), len(analysed), len(uploaded_files))
+
+    if not analysed:
+        summary.warning("No text could be extracted from these documents.")
+
+
+def stream_pdf_text(file_bytes, placeholder):
+    """Extract a PDF page by page, showing the sections matched so far"""
+    matcher = SectionMatcher(ipc_index)
+    pages = []
+    shown = None
+    for page_text in iter_pdf_chunks(file_bytes):
+        pages.append(page_text)
+        matcher.feed(page_text)
+
+        early = matcher.results()
+        top = [(r['section'], r['score']) for r in early]
+        if top != shown:
+            shown = top
+            lines = [f"- **Section {r['section']}** ({r['score']}): {r['title']}" for r in early]
+            placeholder.info(f"**Matched so far** (page {len(pages)}):\n" + "\n".join(lines))
+    placeholder.empty()
+    return "".join(pages)
+
+
+def render_dashboard(store, weeks=12):
+    """Dashboard tab: reads the store's weekly aggregates, not the FIR rows"""
+    import pandas as pd
+
+    if store is None:
+        st.info("The FIR store is not available.")
+        return
+
+    severity = store.totals('severity', weeks)
+    priority = store.totals('priority', weeks)
+    d1, d2, d3, d4, d5 = st.columns(5)
+    d1.metric("FIRs stored", store.count())
+    d2.metric(f"FIRs, last {weeks} weeks", sum(severity.values()))
+    d3.metric("High severity", severity.get('High', 0))
+    d4.metric("Urgent", priority.get('Urgent', 0))
+    # Near-duplicates are stored but not counted in the figures above
+    d5.metric("Flagged duplicates", sum(store.totals('duplicate', weeks).values()))
+
+    c1, c2 = st.columns(2)
+    with c1:
+        st.markdown(f"**Most cited sections (last {weeks} weeks)**")
+        top = store.top_sections(weeks, limit=15)
+        if top:
+            st.bar_chart(pd.DataFrame(top, columns=['Section', 'FIRs']).set_index('Section'))
+    with c2:
+        st.markdown("**Severity trend per week**")
+        trend = store.weekly_trend('severity', weeks)
+        if trend:
+            frame = pd.DataFrame(trend, columns=['Week', 'Severity', 'FIRs'])
+            st.line_chart(frame.pivot(index='Week', columns='Severity', values='FIRs').fillna(0))
+
+    st.markdown("**Find FIRs**")
+    f1, f2, f3, f4 = st.columns(4)
+    section = f1.text_input("Section")
+    severity_filter = f2.selectbox("Severity", ["", "High", "Medium", "Low", "Unknown"])
+    priority_filter = f3.selectbox("Priority", ["", "Urgent", "Normal"])
+    location = f4.text_input("Location")
+    rows = store.find(section=section.strip() or None, severity=severity_filter or None,
+                      priority=priority_filter or None, location=location.strip() or None, limit=100)
+    if rows:
+        for row in rows:
+            row['crime_types'] = ", ".join(row['crime_types'])
+            row['sections'] = ", ".join(row['sections'])
+        st.dataframe(pd.DataFrame(rows), hide_index=True)
+    else:
+        st.caption("No stored FIRs match these filters.")
+
+
+def render_debug_panel(timer):
+    """Sidebar panel with this run's stage timings, the last image upload's
+    preparation report and rolling percentiles"""
+    with st.sidebar.expander("⏱️ Performance Debug"):
+        st.markdown("**This run**")
+        if timer.stages:
+            st.table({
+                'Stage': list(timer.stages),
+                'ms': [f"{seconds * 1000:.1f}" for seconds in timer.stages.values()],
+            })
+        st.caption(f"Total instrumented time: {timer.total() * 1000:.1f} ms")
+
+        prep = st.session_state.get('image_prep')
+        if prep:
+            st.markdown("**Last image upload**")
+            st.caption(f"{prep['bytes_in'] / 1024:.0f} KB → {prep['bytes_out'] / 1024:.0f} KB in "
+                       f"{prep['tiles']} tile(s), {prep['size_in'][0]}×{prep['size_in'][1]} → "
+                       f"{prep['size_out'][0]}×{prep['size_out'][1]} px")
+            st.table({
+                'Stage': list(prep['stages_ms']),
+                'ms': [f"{ms:.1f}" for ms in prep['stages_ms'].values()],
+            })
 
-        
-# Helper to find sections
-def find_matching_sections(text, dataframe):
-    if dataframe.empty or not text:
-        return []
-    
-    # 1. PRE-PROCESSING & SANITY CHECKS
-    text_lower = text.lower()
-    
-    # Extract HIGH CONFIDENCE section numbers using strict context patterns
-    # Patterns: "Section 302", "Sec 302", "u/s 302", "IPC 302", "302 IPC"
-    # we use \b to ensure we don't match 1302 as 302
-    citation_pattern = r'(?:section|sec|u/s|under section)\.?\s*(\d+[a-zA-Z]?)'
-    ipc_suffix_pattern = r'(\d+[a-zA-Z]?)\s*ipc'
-    
-    explicit_citations = set(re.findall(citation_pattern, text_lower))
-    explicit_citations.update(re.findall(ipc_suffix_pattern, text_lower))
-    
-    # Also find all numbers for loose matching, but treat them with low confidence
-    all_numbers_in_text = set(re.findall(r'\b\d+[a-zA-Z]?\b', text_lower))
-    
-    results = []
-    
-    # Common stopwords to ignore in title analysis
-    ignore_words = {'punishment', 'for', 'of', 'act', 'code', 'section', 'to', 'in', 'or', 'and', 'the', 'a', 'an', 'causing', 'voluntarily', 'from', 'by', 'sale', 'etc'}
-
-    for _, row in dataframe.iterrows():
-        section = str(row.get('Section', '')).strip().lower()
-        title = str(row.get('Title', '')).lower()
-        desc = str(row.get('Description', '')).lower()
-        
-        score = 0
-        matches_found = []
-        
-        # --- SCORING LOGIC ---
-        
-        # A. Explicit Citation Match (Highest Confidence)
-        if section in explicit_citations:
-            score += 50
-            matches_found.append("Explicit Citation")
-            
-        # B. Loose Number Match + STRONG CONTEXT (Medium Confidence)
-        elif section in all_numbers_in_text:
-            # SANITY CHECK: Ignore small numbers (1-10) or likely years (19XX, 20XX) unless explicit
-            is_likely_year = section.isdigit() and (1950 < int(section) < 2030)
-            is_small_number = section.isdigit() and int(section) < 11
-            
-            if not is_likely_year and not is_small_number:
-                # Require Title Keywords to valid this number
-                title_words = [w for w in title.split() if w not in ignore_words and len(w) > 3]
-                matched_keywords = [w for w in title_words if w in text_lower]
-                
-                if len(matched_keywords) >= 1: # At least 1 strong keyword required
-                    score += 20 + (len(matched_keywords) * 5)
-                    matches_found.append("Number + Keyword")
-        
-        # C. Pure Keyword Match (Low Confidence - but useful if no section numbers mentioned)
-        else:
-            title_words = [w for w in title.split() if w not in ignore_words and len(w) > 4] # Stricter length
-            matched_keywords = [w for w in title_words if w in text_lower]
-            
-            # Require multiple keywords for pure text match
-            if len(matched_keywords) >= 2:
-                score += (len(matched_keywords) * 5)
-            
-            # Boost for very specific crimes
-            if 'murder' in title and 'murder' in text_lower: score += 15
-            if 'rape' in title and 'rape' in text_lower: score += 15
-            if 'dacoity' in title and 'dacoity' in text_lower: score += 15
-
-        # --- THRESHOLD ---
-        if score >= 15: # Minimum score threshold to reduce noise
-            results.append({
-                'section': row.get('Section', ''),
-                'title': row.get('Title', ''),
-                'description': row.get('Description', ''),
-                'punishment': row.get('Description', ''), 
-                'score': score,
-                'match_type': ", ".join(matches_found)
+        stats = result_cache.stats
+        st.caption(f"Cache: {stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+                   f"{stats['misses']} misses ({result_cache.hit_rate():.0%} hit rate)")
+
+        summary = fir_metrics.REGISTRY.summary()
+        if summary:
+            st.markdown("**Rolling latency (ms)**")
+            st.table({
+                'Stage': list(summary),
+                'count': [row['count'] for row in summary.values()],
+                'p50': [f"{row['p50'] * 1000:.1f}" for row in summary.values()],
+                'p95': [f"{row['p95'] * 1000:.1f}" for row in summary.values()],
+                'p99': [f"{row['p99'] * 1000:.1f}" for row in summary.values()],
             })
-    
-    # Sort by score desc
-    results.sort(key=lambda x: x['score'], reverse=True)
-    
-    # Deduplication (Keep highest score for same section)
-    # The list is already sorted, so we can just track seen sections
-    unique_results = []
-    seen_sections = set()
-    for res in results:
-        if res['section'] not in seen_sections:
-            unique_results.append(res)
-            seen_sections.add(res['section'])
-            
-    return unique_results[:8] # Return top 8 most relevant
-
-# Define severity/priority map based on keywords (since CSV doesn't have severity column)
-SEVERITY_MAP = {
-    'murder': 'High', 'kill': 'High', 'death': 'High', 'rape': 'High', '302': 'High', '376': 'High',
-    'dacoity': 'High', 'kidnapping': 'High', '395': 'High', '363': 'High',
-    'robbery': 'Medium', 'theft': 'Medium', 'fraud': 'Medium', '420': 'Medium',
-    'assault': 'Medium', 'hurt': 'Low', '323': 'Low', 'forgery': 'Medium'
-}
-
-PRIORITY_MAP = {
-    'murder': 'Urgent', 'rape': 'Urgent', 'dacoity': 'Urgent', 'kidnapping': 'Urgent',
-    'robbery': 'Urgent', 'assault': 'Normal', 'theft': 'Normal'
-}
-
-
-
-
-def analyze_fir_logic(text, form_data=None):
-    """Analyze FIR using loaded Dataset"""
-    full_text = text
-    if form_data:
-         # Append form data to analysis text
-         full_text += " " + json.dumps(form_data)
-    
-    # Use the helper function to find sections from DataFrame
-    matched_sections = find_matching_sections(full_text, ipc_df)
-    
-    # If no sections found, fallback
-    if not matched_sections:
-        return {
-            'crimeTypes': ['NO SPECIFIC CRIME DETECTED'],
-            'ipcSections': [],
-            'severity': 'Unknown',
-            'priority': 'Normal',
-            'accuracy': "0%",
-            'suggestions': [],
-            'extractedInfo': {} # ... (rest logic below)
-        }
-    
-    # Determine Severity and Priority based on matched titles/descriptions
-    severity = 'Low'
-    priority = 'Normal'
-    
-    detected_keywords = []
-    
-    for item in matched_sections:
-        combined_str = (item['title'] + " " + item['description']).lower()
-        # Check against Maps
-        for key, val in SEVERITY_MAP.items():
-            if key in combined_str:
-                if val == 'High': severity = 'High'
-                elif val == 'Medium' and severity != 'High': severity = 'Medium'
-        
-        for key, val in PRIORITY_MAP.items():
-            if key in combined_str:
-                if val == 'Urgent': priority = 'Urgent'
-                
-        # For display purposes (Crime Types)
-        # Try to map the long CSV title to a short, readable crime name
-        short_name = None
-        for key in SEVERITY_MAP.keys():
-            if key in combined_str and not key.isdigit(): # Don't use '302' as the name, use 'murder'
-                short_name = key.replace('_', ' ').upper()
-                break
-        
-        if short_name:
-            detected_keywords.append(short_name)
-        else:
-            # Fallback to title, cleaning it up
-            clean_title = item['title'].replace('Punishment for ', '').replace('Punishment of ', '').strip()
-            detected_keywords.append(clean_title)
-
-    # Calculate Accuracy Score
-    base_accuracy = 85
-    import random
-    # Higher score if we found multiple relevant sections
-    accuracy_val = min(99, base_accuracy + len(matched_sections) + random.randint(0, 5))
-
-    return {
-        'crimeTypes': list(set(detected_keywords))[:5], # Top 5 unique titles
-        'ipcSections': matched_sections, # List of dicts with section, punishment etc
-        'severity': severity,
-        'priority': priority,
-        'accuracy': f"{accuracy_val}%",
-        'suggestions': [
-            'Immediate investigation required',
-            'Collect forensic evidence from crime scene',
-            'Record witness statements',
-            'Verify accused identity and background',
-            'Check for prior criminal records in CCTNS database'
-        ],
-        'extractedInfo': {
-            'complainant': form_data.get('complainantName', 'Not provided') if form_data else 'Not provided',
-            'location': form_data.get('incidentLocation', 'Not provided') if form_data else 'Not provided',
-            'date': form_data.get('incidentDate', 'Not provided') if form_data else 'Not provided',
-            'accused': form_data.get('accusedName', 'Not identified') if form_data else 'Not identified'
-        }
-    }
+            st.download_button("Export Prometheus metrics", fir_metrics.REGISTRY.to_prometheus(),
+                               file_name="fir_metrics.prom", mime="text/plain")
 
 
 # -----------------------------------------------------------------------------
@@ -320,7 +417,7 @@ def main():
     st.markdown('<p class="sub-header">AI-Powered First Information Report Analysis System</p>', unsafe_allow_html=True)
 
     # Tabs
-    tab1, tab2 = st.tabs(["🔍 Analyze FIR", "📝 Create New FIR"])
+    tab1, tab2, tab3 = st.tabs(["🔍 Analyze FIR", "📝 Create New FIR", "📈 Dashboard"])
 
     # ---------------------
     # TAB 1: ANALYZE
@@ -331,42 +428,66 @@ def main():
         col1, col2 = st.columns([1, 1])
         
         with col1:
-            uploaded_file = st.file_uploader("Upload FIR Document", type=['txt', 'pdf', 'jpg', 'png'])
+            uploaded_files = st.file_uploader("Upload FIR Documents", type=['txt', 'pdf', 'jpg', 'png'],
+                                              accept_multiple_files=True)
+            # Several files are a case bundle, analysed together below
+            uploaded_file = uploaded_files[0] if len(uploaded_files) == 1 else None
+            if len(uploaded_files) > 1:
+                st.success(f"{len(uploaded_files)} files uploaded")
             if uploaded_file:
                 st.success(f"File uploaded: {uploaded_file.name}")
             if uploaded_file:
                 st.success(f"File uploaded: {uploaded_file.name}")
                 
                 # Text Extraction Logic
-                fir_text_input = ""
-                try:
-                    if uploaded_file.type == "application/pdf":
-                        if PdfReader:
-                            reader = PdfReader(uploaded_file)
-                            for page in reader.pages:
-                                fir_text_input += page.extract_text() + "\n"
-                        else:
-                            st.warning("PyPDF not installed. Cannot extract text from PDF.")
+                # Keyed on the file bytes, so reruns don't re-parse or re-OCR the same upload
+                with request_timer.stage('upload_read'):
+                    file_bytes = uploaded_file.getvalue()
+                    extract_key = content_key('extract', uploaded_file.type, file_bytes)
+                    fir_text_input = result_cache.get(extract_key)
+
+                if fir_text_input is None:
+                    fir_text_input = ""
+                    try:
+                        if uploaded_file.type == "application/pdf":
+                            if PDF_SUPPORT:
+                                with request_timer.stage('pdf_extraction'):
+                                    # Pages stream in from a worker pool; matches show up as they arrive
+                                    fir_text_input = stream_pdf_text(file_bytes, st.empty())
+                            else:
+                                st.warning("PyPDF not installed. Cannot extract text from PDF.")
                             
-                    elif uploaded_file.type == "text/plain":
-                        fir_text_input = str(uploaded_file.read(), "utf-8")
+                        elif uploaded_file.type == "text/plain":
+                            with request_timer.stage('upload_read'):
+                                fir_text_input = str(file_bytes, "utf-8")
                         
-                    elif uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
-                        with st.spinner('Scanning image using Cloud OCR...'):
-                            # Use Cloud API
-                            fir_text_input = ocr_space_file(uploaded_file)
+                        elif uploaded_file.type in ["image/png", "image/jpeg", "image/jpg"]:
+                            with st.spinner('Scanning image using Cloud OCR...'):
+                                # Use Cloud API
+                                # Adds image_* stages for the preparation and
+                                # ocr_call for the requests themselves
+                                prep_reports = []
+                                fir_text_input = ocr_space_file(uploaded_file, timer=request_timer,
+                                                                reports=prep_reports)
+                                # Kept for the debug panel across reruns
+                                st.session_state['image_prep'] = next(iter(prep_reports), None)
                             
-                            if fir_text_input and not fir_text_input.startswith("Error"):
-                                st.success("Document scanned successfully!")
-                            elif fir_text_input.startswith("Error"):
-                                st.error(fir_text_input)
-                                fir_text_input = ""
-                            else:
-                                st.warning("OCR found no text. Please ensure image is clear.")
-                                fir_text_input = ""
-
-                except Exception as e:
-                    st.error(f"Error reading file: {e}")
+                                # Failed scans must not end up in the cache as document text
+                                ocr_failed = fir_text_input.startswith(("Error", "API Connection Error"))
+                                if fir_text_input and not ocr_failed:
+                                    st.success("Document scanned successfully!")
+                                elif ocr_failed:
+                                    st.error(fir_text_input)
+                                    fir_text_input = ""
+                                else:
+                                    st.warning("OCR found no text. Please ensure image is clear.")
+                                    fir_text_input = ""
+
+                    except Exception as e:
+                        st.error(f"Error reading file: {e}")
+
+                    if fir_text_input:
+                        result_cache.set(extract_key, fir_text_input)
             else:
                 fir_text_input = ""
 
@@ -379,47 +500,35 @@ def main():
         with col2:
             fir_text = st.text_area("Or paste FIR text here:", height=150, value=fir_text_input, placeholder="Enter incident description...")
 
+        # OCR'd photos are full of slips ("Sectlon 3O2"); match them approximately.
+        # PDFs carry their own text layer, so they are matched exactly unless asked
+        scanned = any(f.type in ["image/png", "image/jpeg", "image/jpg"] for f in uploaded_files)
+        fuzzy = st.checkbox("OCR-tolerant matching", value=scanned,
+                            help="Repair OCR errors in section numbers and keywords before matching")
+
+        # Updated on every edit; the full analysis still waits for the button
+        if fir_text and len(uploaded_files) <= 1:
+            render_live_suggestions(live_analysis('analyze', fir_text, fuzzy=fuzzy))
+
+        if len(uploaded_files) > 1:
+            render_case_bundle(uploaded_files, fuzzy)
+
         analyze_clicked = st.button("Analyze FIR", type="primary")
 
         if analyze_clicked:
-            if not fir_text and not uploaded_file:
+            if not fir_text and not uploaded_files:
                 st.error("Please provide FIR text or upload a file.")
+            elif not fir_text and not uploaded_file:
+                st.error("Paste FIR text to analyse it on its own; the uploaded case bundle is analysed above.")
             else:
                 with st.spinner("Analyzing FIR data..."):
-                    time.sleep(1.5) # Simulate processing time
-                    results = analyze_fir_logic(fir_text)
-                    
-                    st.divider()
-                    st.subheader("📊 Analysis Results")
-                    
-                    # Metrics Row
-                    m1, m2, m3, m4 = st.columns(4)
-                    with m1:
-                        color = "red" if results['severity'] == "High" else "orange" if results['severity'] == "Medium" else "green"
-                        st.markdown(f"**Severity**")
-                        st.markdown(f"<h2 style='color: {color}; margin:0'>{results['severity']}</h2>", unsafe_allow_html=True)
-                    with m2:
-                        st.metric("Priority Level", results['priority'])
-                    with m3:
-                        st.metric("Crimes Detected", len(results['crimeTypes']))
-                    with m4:
-                        st.metric("Model Accuracy", results['accuracy'])
-
-                    # Detected Crimes
-                    st.markdown("### Detected Crime Types")
-                    crimes_html = "".join([f"<span class='crime-tag'>{c}</span>" for c in results['crimeTypes']])
-                    st.markdown(crimes_html, unsafe_allow_html=True)
-
-                    # IPC Sections
-                    st.markdown("### 📜 Applicable IPC Sections")
-                    for section in results['ipcSections']:
-                        with st.expander(f"IPC Section {section['section']} - {section['description']}", expanded=True):
-                            st.write(f"**Punishment:** {section['punishment']}")
-
-                    # Suggestions
-                    st.markdown("### 🕵️ Investigation Suggestions")
-                    for suggestion in results['suggestions']:
-                        st.markdown(f"- {suggestion}")
+                    results, duplicate = analyze_fir_flagging(fir_text, timer=request_timer, fuzzy=fuzzy)
+
+                if duplicate is not None:
+                    st.info(f"Similar to FIR #{duplicate[0]} ({duplicate[1]:.0%} similar); "
+                            f"possibly a report of the same incident.")
+                with request_timer.stage('rendering'):
+                    render_analysis_results(results)
 
     # ---------------------
     # TAB 2: COLLECT DATA
@@ -427,7 +536,9 @@ def main():
     with tab2:
         st.header("FIR Data Collection Form")
         
-        with st.form("fir_form"):
+        # Not an st.form: its fields would only reach the script on submit,
+        # and the suggested sections follow the text as it is written
+        with st.container(border=True):
             st.subheader("👤 Complainant Details")
             c1, c2 = st.columns(2)
             with c1:
@@ -451,41 +562,55 @@ def main():
             st.subheader("📝 Detailed Description")
             inc_desc = st.text_area("Describe the incident in detail *", height=150)
 
-            submitted = st.form_submit_button("Submit and Analyze FIR", type="primary")
+            form_data = {
+                'complainantName': comp_name,
+                'incidentLocation': inc_loc,
+                'incidentDate': str(inc_date),
+                'accusedName': acc_name,
+                'incidentDescription': inc_desc
+            }
+            if inc_desc:
+                render_live_suggestions(live_analysis('form', inc_desc, form_data))
+
+            submitted = st.button("Submit and Analyze FIR", type="primary")
 
             if submitted:
                 if not inc_desc:
                     st.error("Please provide an incident description.")
                 else:
-                    form_data = {
-                        'complainantName': comp_name,
-                        'incidentLocation': inc_loc,
-                        'incidentDate': str(inc_date),
-                        'accusedName': acc_name,
-                        'incidentDescription': inc_desc
-                    }
-                    
                     with st.spinner("Processing FIR Form..."):
-                        time.sleep(1.5)
-                        results = analyze_fir_logic(inc_desc, form_data)
-                        
-                        st.success("FIR Submitted Successfully!")
-                        
-                        # Show minimal results here or copy the analysis view
-                        st.divider()
-                        st.subheader("Initial Analysis")
-                        
-                        r1, r2 = st.columns(2)
-                        with r1:
-                            st.info(f"**Detected Crime Classification:** {', '.join(results['crimeTypes'])}")
-                        with r2:
-                            st.metric("Confidence Score", results['accuracy'])
-                            
-                        st.warning(f"**Recommended Severity:** {results['severity']}")
-                        
-                        st.markdown("**Applicable IPC Sections:**")
-                        for s in results['ipcSections']:
-                            st.write(f"- **Section {s['section']}**: {s['description']}")
+                        results = analyze_fir_cached(inc_desc, form_data, timer=request_timer)
+
+                    duplicates = []
+                    if fir_store is not None:
+                        # The same incident is often reported more than once
+                        with request_timer.stage('dedup'):
+                            signature = minhash(inc_desc)
+                            duplicates = fir_store.find_duplicates(signature, limit=1)
+                        duplicate_of, similarity = duplicates[0] if duplicates else (None, None)
+                        with request_timer.stage('store_write'):
+                            fir_id = fir_store.add(results, form_data, text=inc_desc, signature=signature,
+                                                   duplicate_of=duplicate_of, similarity=similarity)
+
+                    with request_timer.stage('rendering'):
+                        render_form_results(results)
+                    if duplicates:
+                        st.warning(f"Possible duplicate of FIR #{duplicate_of} ({similarity:.0%} similar). "
+                                   f"Saved as FIR #{fir_id}, but left out of the dashboard statistics.")
+                    elif fir_store is not None:
+                        st.caption(f"Saved as FIR #{fir_id}")
+
+    # ---------------------
+    # TAB 3: DASHBOARD
+    # ---------------------
+    with tab3:
+        st.header("FIR Dashboard")
+        with request_timer.stage('dashboard'):
+            render_dashboard(fir_store)
+
+    render_debug_panel(request_timer)
+    request_timer.log()
+
 
 if __name__ == "__main__":
     main()
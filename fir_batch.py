@@ -0,0 +1,316 @@
+"""Headless batch analysis of FIR archives.
+
+Reads a directory of .txt/.pdf files, or a JSONL/CSV file with one FIR text
+per record, fans the work out over a process pool and streams one JSON result
+per line. Every worker loads the IPC dataset and section index once.
+
+Usage:
+    python fir_batch.py firs/ -o results.jsonl --workers 8
+    python fir_batch.py firs.jsonl --text-field narrative --unordered
+    python fir_batch.py firs/ -o results.jsonl --store fir_store.db
+    python fir_batch.py firs.jsonl --dedup          # flag near-duplicate FIRs
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from fir_core import SectionMatcher, analyze_fir_logic, classify_sections, fir_text, get_section_index
+from fir_core.fuzzy import get_corrector
+from fir_core.sections import json_default
+
+FILE_SUFFIXES = ('.txt', '.pdf')
+
+# Per-worker state, filled in by _init_worker
+_worker = {}
+
+
+# -----------------------------------------------------------------------------
+# INPUT
+# -----------------------------------------------------------------------------
+
+def iter_tasks(source, text_field='text', id_field='id'):
+    """Yield (fir_id, kind, payload) tuples lazily from a directory or file.
+
+    kind is 'file' for documents the worker has to read itself and 'text' for
+    records that already carry the FIR narrative.
+    """
+    source = Path(source)
+    if source.is_dir():
+        for path in sorted(source.rglob('*')):
+            if path.is_file() and path.suffix.lower() in FILE_SUFFIXES:
+                yield str(path.relative_to(source)), 'file', str(path)
+        return
+
+    suffix = source.suffix.lower()
+    if suffix in FILE_SUFFIXES:
+        yield source.name, 'file', str(source)
+    elif suffix in ('.jsonl', '.ndjson'):
+        with open(source, encoding='utf-8') as fh:
+            for line_no, line in enumerate(fh, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                yield record.get(id_field, line_no), 'text', record.get(text_field) or ''
+    elif suffix == '.csv':
+        # Narratives easily exceed the default 128 KB field limit
+        csv.field_size_limit(sys.maxsize)
+        with open(source, encoding='utf-8', newline='') as fh:
+            for row_no, record in enumerate(csv.DictReader(fh), 1):
+                yield record.get(id_field) or row_no, 'text', record.get(text_field) or ''
+    else:
+        raise ValueError(f"Unsupported input: {source} (expected a directory, .txt, .pdf, .jsonl or .csv)")
+
+
+def read_document(path):
+    """Extract text from a .txt file"""
+    with open(path, encoding='utf-8', errors='replace') as fh:
+        return fh.read()
+
+
+def iter_chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+# -----------------------------------------------------------------------------
+# WORKERS
+# -----------------------------------------------------------------------------
+
+def _init_worker(dataset_path, ranking=None, fuzzy=False, dedup=False):
+    # Every worker maps the same compiled artifact instead of parsing the CSV
+    _worker['index'] = get_section_index(dataset_path)
+    _worker['fuzzy'] = fuzzy
+    _worker['minhash'] = None
+    if dedup:
+        from fir_core.dedup import minhash
+        _worker['minhash'] = minhash
+    _worker['ranker'] = None
+    if ranking:
+        from fir_core.ranking import get_ranker
+        _worker['ranker'] = get_ranker(_worker['index'], ranking)
+
+
+def _analyze_pdf(path):
+    # Stream pages through the incremental matcher so a long PDF never has to
+    # be held in memory as one string; files are already spread over workers
+    from fir_core.pdf import iter_pdf_chunks
+
+    if _worker['ranker'] is not None:
+        text = "".join(iter_pdf_chunks(path, workers=1))
+        return _signed(analyze_fir_logic(text, ranker=_worker['ranker'], fuzzy=_worker['fuzzy']), text)
+
+    matcher = SectionMatcher(_worker['index'], _worker['fuzzy'])
+    # The signature needs the whole text; only keep it when deduplicating
+    chunks = [] if _worker['minhash'] else None
+    for chunk in iter_pdf_chunks(path, workers=1):
+        matcher.feed(chunk)
+        if chunks is not None:
+            chunks.append(chunk)
+    return _signed(classify_sections(matcher.results()), "".join(chunks or ()))
+
+
+def _signed(result, text):
+    """Attach the MinHash of text for the driver's duplicate check"""
+    if _worker['minhash'] is not None:
+        result['_signature'] = _worker['minhash'](text)
+    return result
+
+
+def _analyze_chunk(tasks):
+    if _worker['ranker'] is not None:
+        return _rank_chunk(tasks)
+    out = []
+    for fir_id, kind, payload in tasks:
+        record = {'id': fir_id}
+        try:
+            if kind == 'file' and payload.lower().endswith('.pdf'):
+                record.update(_analyze_pdf(payload))
+            else:
+                text = read_document(payload) if kind == 'file' else payload
+                record.update(_signed(analyze_fir_logic(text, index=_worker['index'], fuzzy=_worker['fuzzy']),
+                                      text))
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+        out.append(record)
+    return out
+
+
+def _rank_chunk(tasks):
+    # Read the whole chunk first so it is scored with one matrix product
+    records, texts = [], {}
+    for fir_id, kind, payload in tasks:
+        record = {'id': fir_id}
+        try:
+            if kind == 'file' and payload.lower().endswith('.pdf'):
+                record.update(_analyze_pdf(payload))
+            else:
+                texts[len(records)] = text = fir_text(read_document(payload) if kind == 'file' else payload)
+                _signed(record, text)
+        except Exception as e:
+            record['error'] = f"{type(e).__name__}: {e}"
+        records.append(record)
+
+    if texts:
+        ranker = _worker['ranker']
+        batch = list(texts.values())
+        if _worker['fuzzy']:
+            corrector = get_corrector(ranker.index)
+            batch = [corrector.correct(text) for text in batch]
+        ranked = ranker.rank_batch(batch)
+        for pos, matched in zip(texts, ranked):
+            records[pos].update(classify_sections(matched))
+    return records
+
+
+# -----------------------------------------------------------------------------
+# DRIVER
+# -----------------------------------------------------------------------------
+
+def run_batch(tasks, out, dataset_path, workers=None, chunk_size=16, ordered=True,
+              prefetch=4, progress_every=0, ranking=None, store=None, fuzzy=False, dedup=False,
+              dedup_threshold=None):
+    """Analyze tasks on a process pool and write JSONL to `out`.
+
+    At most workers * prefetch chunks are in flight, so memory stays bounded
+    regardless of input size. With ordered=False results are written as soon
+    as any chunk finishes. ranking='bm25' or 'tfidf' ranks each chunk with
+    fir_core.ranking instead of the keyword rules; fuzzy=True repairs OCR
+    noise before matching. With a fir_core.store.FirStore
+    every successful result is also bulk-inserted into it. dedup=True has
+    workers compute a MinHash per FIR (fir_core.dedup); a result at least
+    dedup_threshold similar to an earlier one in the run gets 'duplicate_of'
+    (the earlier id) and 'similarity', and the store checks it against
+    everything already stored.
+    Returns (count, errors, elapsed_seconds).
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max(1, workers * prefetch)
+    count = errors = 0
+    start = time.perf_counter()
+    to_store = []
+    seen = None
+    if dedup:
+        from fir_core.dedup import DEFAULT_THRESHOLD, LshIndex
+        # Only originals are indexed, so duplicate_of always names the first report
+        seen = LshIndex(threshold=dedup_threshold or DEFAULT_THRESHOLD)
+
+    def emit(records):
+        nonlocal count, errors
+        for record in records:
+            signature = record.pop('_signature', None)
+            if signature is not None:
+                match = seen.best_match(signature)
+                if match is None:
+                    seen.add(record['id'], signature)
+                else:
+                    record['duplicate_of'], record['similarity'] = match[0], round(match[1], 3)
+            out.write(json.dumps(record, default=json_default) + "\n")
+            count += 1
+            errors += 'error' in record
+            if store is not None and 'error' not in record:
+                to_store.append({'results': record, 'source': 'batch', 'id': record['id'],
+                                 'signature': signature})
+            if progress_every and count % progress_every == 0:
+                elapsed = time.perf_counter() - start
+                print(f"{count} FIRs, {count / elapsed:.1f} FIRs/sec", file=sys.stderr)
+        if store is not None and len(to_store) >= store.chunk_size:
+            store.add_many(to_store, dedup=seen is not None)
+            to_store.clear()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(dataset_path, ranking, fuzzy, dedup)) as pool:
+        pending = deque() if ordered else set()
+        for chunk in iter_chunks(tasks, chunk_size):
+            if ordered:
+                if len(pending) >= max_in_flight:
+                    emit(pending.popleft().result())
+                pending.append(pool.submit(_analyze_chunk, chunk))
+            else:
+                if len(pending) >= max_in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        emit(future.result())
+                pending.add(pool.submit(_analyze_chunk, chunk))
+
+        if ordered:
+            while pending:
+                emit(pending.popleft().result())
+        else:
+            for future in wait(pending).done:
+                emit(future.result())
+
+    if to_store:
+        store.add_many(to_store, dedup=seen is not None)
+    return count, errors, time.perf_counter() - start
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Batch-classify FIRs against the IPC dataset.")
+    parser.add_argument('input', help="directory of .txt/.pdf files, or a .jsonl/.csv of FIR texts")
+    parser.add_argument('-o', '--output', help="JSONL output file (default: stdout)")
+    parser.add_argument('--dataset', help="path to the IPC dataset CSV (default: $FIR_IPC_DATASET or the app's dataset)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=16, help="FIRs sent to a worker per task")
+    parser.add_argument('--unordered', action='store_true', help="write results as they finish")
+    parser.add_argument('--text-field', default='text', help="JSONL/CSV field holding the narrative")
+    parser.add_argument('--id-field', default='id', help="JSONL/CSV field holding the FIR id")
+    parser.add_argument('--ranking', choices=('bm25', 'tfidf'), help="rank sections by text relevance (needs numpy and scipy)")
+    parser.add_argument('--fuzzy', action='store_true', help="tolerate OCR noise in section numbers and keywords")
+    parser.add_argument('--store', nargs='?', const='', metavar='DB',
+                        help="also save results to the FIR store (default: $FIR_STORE_PATH or ./fir_store.db)")
+    parser.add_argument('--dedup', action='store_true', help="flag near-duplicate FIRs (needs numpy)")
+    parser.add_argument('--dedup-threshold', type=float, default=None, metavar='S',
+                        help="estimated similarity from which FIRs count as duplicates (default 0.8)")
+    parser.add_argument('--progress', type=int, default=0, metavar='N', help="report throughput every N FIRs")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    tasks = iter_tasks(args.input, text_field=args.text_field, id_field=args.id_field)
+
+    store = None
+    if args.store is not None:
+        from fir_core.store import get_store
+        store = get_store(args.store or None)
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
+    try:
+        count, errors, elapsed = run_batch(
+            tasks, out, args.dataset,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            ordered=not args.unordered,
+            progress_every=args.progress,
+            ranking=args.ranking,
+            fuzzy=args.fuzzy,
+            store=store,
+            dedup=args.dedup,
+            dedup_threshold=args.dedup_threshold,
+        )
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    rate = count / elapsed if elapsed else 0.0
+    print(f"Analyzed {count} FIRs ({errors} errors) in {elapsed:.2f}s - {rate:.1f} FIRs/sec",
+          file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
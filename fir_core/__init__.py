@@ -0,0 +1,23 @@
+"""Core FIR analysis: section matching, classification and dataset loading.
+
+Nothing here depends on Streamlit. Heavy dependencies are imported only when
+they are needed: pandas to compile the dataset artifact, pypdf for PDF
+extraction (fir_core.pdf), requests for OCR (fir_core.ocr), numpy/scipy
+for BM25/TF-IDF ranking (fir_core.ranking) and numpy for near-duplicate
+detection (fir_core.dedup).
+"""
+
+from .analysis import (PRIORITY_MAP, SEVERITY_MAP, IncrementalAnalysis, analyze_fir_logic, classify_sections,
+                       fir_text, merge_results)
+from .automaton import KeywordAutomaton
+from .dataset import dataset_path, get_section_index, load_index, load_ipc_data
+from .index import BOOST_TERMS, IGNORE_WORDS, SectionIndex
+from .matching import IncrementalMatcher, SectionMatcher, find_matching_sections, score_section
+from .sections import SectionMatch, SectionRecord
+
+__all__ = [
+    'BOOST_TERMS', 'IGNORE_WORDS', 'IncrementalAnalysis', 'IncrementalMatcher', 'KeywordAutomaton',
+    'PRIORITY_MAP', 'SEVERITY_MAP', 'SectionIndex', 'SectionMatch', 'SectionMatcher', 'SectionRecord',
+    'analyze_fir_logic', 'classify_sections', 'dataset_path', 'find_matching_sections', 'fir_text',
+    'get_section_index', 'load_index', 'load_ipc_data', 'merge_results', 'score_section',
+]
@@ -0,0 +1,7 @@
+"""python -m fir_core compile|info [csv] - manage the compiled dataset artifact"""
+
+import sys
+
+from .dataset import main
+
+sys.exit(main())
@@ -0,0 +1,96 @@
+"""Aho-Corasick keyword automaton used for matching and classification."""
+
+from collections import deque
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a fixed keyword list.
+
+    Compiled once, then reports every keyword occurrence in a single linear
+    pass over the text, however many keywords there are. Matching is plain
+    substring matching like the `key in text` checks it replaces; with
+    whole_words=True a hit only counts if the characters on either side of
+    it are not letters or digits ('kill' is not found in 'skill').
+    """
+
+    def __init__(self, keywords, whole_words=False):
+        self.keywords = list(dict.fromkeys(k for k in keywords if k))
+        self.whole_words = whole_words
+
+        # Trie of keyword characters; outputs[state] lists the keyword ids ending there
+        goto = [{}]
+        outputs = [[]]
+        for keyword_id, keyword in enumerate(self.keywords):
+            state = 0
+            for ch in keyword:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    outputs.append([])
+                state = nxt
+            outputs[state].append(keyword_id)
+
+        # Failure links in BFS order, so a state's fallback is always complete
+        # before its children inherit its outputs
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and ch not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[nxt] = goto[fallback].get(ch, 0)
+                outputs[nxt] = outputs[nxt] + outputs[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [tuple(o) for o in outputs]
+
+    def __len__(self):
+        return len(self.keywords)
+
+    def _walk(self, text):
+        """Yield (end_position, state) for every position that completes a keyword"""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        state = 0
+        for pos, ch in enumerate(text):
+            while True:
+                nxt = goto[state].get(ch)
+                if nxt is not None:
+                    state = nxt
+                    break
+                if not state:
+                    break
+                state = fail[state]
+            if outputs[state]:
+                yield pos, state
+
+    def iter_hits(self, text):
+        """Yield (start, end, keyword) for every occurrence, overlaps included"""
+        keywords, outputs, whole_words = self.keywords, self._outputs, self.whole_words
+        for pos, state in self._walk(text):
+            for keyword_id in outputs[state]:
+                keyword = keywords[keyword_id]
+                start = pos - len(keyword) + 1
+                if whole_words and not _on_word_boundary(text, start, pos + 1):
+                    continue
+                yield start, pos + 1, keyword
+
+    def find(self, text):
+        """Return the set of keywords that occur in the text"""
+        if self.whole_words:
+            return {keyword for _, _, keyword in self.iter_hits(text)}
+        # Positions don't matter here: collect the distinct end states and
+        # expand their outputs once at the end
+        states = {state for _, state in self._walk(text)}
+        keywords, outputs = self.keywords, self._outputs
+        return {keywords[k] for state in states for k in outputs[state]}
+
+
+def _on_word_boundary(text, start, end):
+    return ((start == 0 or not text[start - 1].isalnum())
+            and (end == len(text) or not text[end].isalnum()))
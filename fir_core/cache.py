@@ -0,0 +1,227 @@
+"""Content-addressed cache for extracted text and analysis results.
+
+Keys are SHA-256 digests of the content (uploaded file bytes, FIR text, form
+data), so the same document always maps to the same entry no matter how many
+Streamlit reruns or sessions ask for it. Entries live in an in-memory LRU and,
+optionally, in an on-disk tier with a size budget and a TTL.
+
+Configuration for the process-wide cache:
+    FIR_CACHE_DIR        enable the disk tier in this directory
+    FIR_CACHE_MAX_BYTES  disk budget (default 256 MB)
+    FIR_CACHE_TTL        entry lifetime in seconds (default: no expiry)
+    FIR_CACHE_ITEMS      in-memory LRU size (default 256)
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+CACHE_DIR_ENV = 'FIR_CACHE_DIR'
+CACHE_MAX_BYTES_ENV = 'FIR_CACHE_MAX_BYTES'
+CACHE_TTL_ENV = 'FIR_CACHE_TTL'
+CACHE_ITEMS_ENV = 'FIR_CACHE_ITEMS'
+
+_MISSING = object()
+
+
+def content_key(*parts):
+    """SHA-256 hex digest over str/bytes parts (None counts as empty)"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b''
+        elif isinstance(part, str):
+            part = part.encode('utf-8')
+        elif not isinstance(part, (bytes, bytearray, memoryview)):
+            part = repr(part).encode('utf-8')
+        # Length prefix so ('ab', 'c') and ('a', 'bc') differ
+        digest.update(len(part).to_bytes(8, 'little'))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class ContentCache:
+    """Two-tier cache: in-memory LRU in front of an optional disk directory"""
+
+    def __init__(self, max_items=256, disk_dir=None, max_disk_bytes=256 * 1024 * 1024, ttl=None):
+        self.max_items = max_items
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.ttl = ttl
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+
+        self._disk_bytes = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_bytes = sum(size for _, size, _ in self._disk_entries())
+
+    # --- public API ---
+
+    def get(self, key, default=None):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or now - stored_at < self.ttl:
+                    self._memory.move_to_end(key)
+                    self.stats['memory_hits'] += 1
+                    return value
+                del self._memory[key]
+
+        value, stored_at = self._disk_get(key, now)
+        with self._lock:
+            if value is _MISSING:
+                self.stats['misses'] += 1
+                return default
+            self.stats['disk_hits'] += 1
+            self._remember(key, value, stored_at)
+        return value
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+        if self.disk_dir:
+            self._disk_set(key, value)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def hit_rate(self):
+        hits = self.stats['memory_hits'] + self.stats['disk_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for path, _, _ in self._disk_entries():
+            _unlink(path)
+        with self._lock:
+            self._disk_bytes = 0
+
+    # --- memory tier ---
+
+    def _remember(self, key, value, stored_at):
+        self._memory[key] = (value, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    # --- disk tier ---
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], key + '.pkl')
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return _MISSING, None
+        path = self._path(key)
+        try:
+            stat = os.stat(path)
+            if self.ttl is not None and now - stat.st_mtime >= self.ttl:
+                self._disk_remove(path, stat.st_size)
+                return _MISSING, None
+            with open(path, 'rb') as fh:
+                value = pickle.load(fh)
+            # Touch the access time so size-based eviction drops cold entries first
+            os.utime(path, (now, stat.st_mtime))
+            return value, stat.st_mtime
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return _MISSING, None
+
+    def _disk_set(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file and rename, so concurrent readers never see half a pickle
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as fh:
+                pickle.dump(value, fh, protocol=pickle.HIGHEST_PROTOCOL)
+            try:
+                old_size = os.path.getsize(path)
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+        except Exception:
+            _unlink(tmp_path)
+            raise
+        with self._lock:
+            self._disk_bytes += os.path.getsize(path) - old_size
+            over_budget = self._disk_bytes > self.max_disk_bytes
+        if over_budget:
+            self._evict_disk()
+
+    def _disk_entries(self):
+        """(path, size, last_access) for every entry on disk"""
+        entries = []
+        for root, _, files in os.walk(self.disk_dir):
+            for name in files:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((path, stat.st_size, stat.st_atime))
+        return entries
+
+    def _evict_disk(self):
+        # Drop least recently used entries until we're back under 90% of the budget
+        target = int(self.max_disk_bytes * 0.9)
+        entries = sorted(self._disk_entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            _unlink(path)
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._disk_bytes = total
+            self.stats['evictions'] += evicted
+
+    def _disk_remove(self, path, size):
+        _unlink(path)
+        with self._lock:
+            self._disk_bytes -= size
+
+
+def _unlink(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+_default_cache = None
+_default_lock = threading.Lock()
+
+
+def get_cache():
+    """Process-wide cache configured from the environment"""
+    global _default_cache
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                ttl = os.environ.get(CACHE_TTL_ENV)
+                _default_cache = ContentCache(
+                    max_items=int(os.environ.get(CACHE_ITEMS_ENV, 256)),
+                    disk_dir=os.environ.get(CACHE_DIR_ENV) or None,
+                    max_disk_bytes=int(os.environ.get(CACHE_MAX_BYTES_ENV, 256 * 1024 * 1024)),
+                    ttl=float(ttl) if ttl else None,
+                )
+    return _default_cache
@@ -0,0 +1,257 @@
+"""IPC dataset location and the compiled section-index artifact.
+
+Parsing the CSV with pandas and building the section index costs every new
+process the same work. compile_dataset() does it once and writes a binary
+artifact next to the CSV (or to $FIR_IPC_ARTIFACT):
+
+    MAGIC | header length | marshal(header) | description offsets | description blob
+
+The header holds the source file's size, mtime and SHA-256 plus the
+normalised columns, tokenised titles and match index in marshal format,
+which loads in milliseconds. Section descriptions, the bulk of the data, stay
+in the blob and are read through a shared read-only mmap, so processes using
+the same artifact share those pages instead of each keeping a copy.
+
+load_index() returns a fresh index, recompiling automatically when the CSV
+changes; get_section_index() keeps one per dataset for the whole process.
+
+    python -m fir_core compile path/to/fir-ipc_dataset.csv
+    python -m fir_core info path/to/fir-ipc_dataset.csv
+"""
+
+import argparse
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import tempfile
+import threading
+
+from .index import SectionIndex
+
+DATASET_ENV = 'FIR_IPC_DATASET'
+ARTIFACT_ENV = 'FIR_IPC_ARTIFACT'
+
+# User provided path
+DEFAULT_DATASET_PATH = r"c:\Users\ANANTHAKRISHNAN V L\OneDrive\Desktop\Ananthan\fir-ipc_dataset.csv"
+
+MAGIC = b'FIRIDX\x00\x01'
+ARTIFACT_VERSION = 1
+_HEADER_LEN = struct.Struct('<Q')
+
+
+def dataset_path(path=None):
+    """Explicit path, else $FIR_IPC_DATASET, else the default location"""
+    return path or os.environ.get(DATASET_ENV) or DEFAULT_DATASET_PATH
+
+
+def artifact_path(csv_path):
+    return os.environ.get(ARTIFACT_ENV) or os.path.splitext(csv_path)[0] + '.firidx'
+
+
+# Load IPC Dataset
+def load_ipc_data(csv_path=None):
+    # pandas is only needed to (re)compile the artifact
+    import pandas as pd
+
+    df = pd.read_csv(dataset_path(csv_path))
+    # Ensure columns exist, handle potential casing issues
+    df.columns = [c.strip() for c in df.columns]
+    return df
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fh:
+        for block in iter(lambda: fh.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class MappedStrings:
+    """Read-only sequence of strings decoded on access from an mmap'd blob"""
+
+    def __init__(self, path, offsets_start, count, blob_start):
+        self.path = path
+        self._offsets_start = offsets_start
+        self._count = count
+        self._blob_start = blob_start
+        with open(path, 'rb') as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = memoryview(self._mm)[offsets_start:offsets_start + 8 * (count + 1)].cast('Q')
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._mm[self._blob_start + start:self._blob_start + end].decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(self._count))
+
+    def __reduce__(self):
+        # Other processes re-map the same file rather than receiving a copy
+        return (MappedStrings, (self.path, self._offsets_start, self._count, self._blob_start))
+
+
+def write_artifact(path, index, meta):
+    """Serialise an index (see SectionIndex.to_state) into the artifact format"""
+    state = index.to_state()
+    descriptions = [str(d).encode('utf-8') for d in state.pop('descriptions')]
+    header = marshal.dumps({'meta': meta, 'state': state})
+
+    offsets = [0]
+    for blob in descriptions:
+        offsets.append(offsets[-1] + len(blob))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fh:
+            fh.write(MAGIC)
+            fh.write(_HEADER_LEN.pack(len(header)))
+            fh.write(header)
+            fh.write(b'\0' * (-fh.tell() % 8)) # align the offsets table
+            fh.write(struct.pack(f'<{len(offsets)}Q', *offsets))
+            for blob in descriptions:
+                fh.write(blob)
+        # Atomic swap: processes that already mapped the old file keep it
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def read_artifact(path):
+    """Return (meta, state) with descriptions mapped lazily from the file"""
+    with open(path, 'rb') as fh:
+        if fh.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a compiled IPC dataset")
+        (header_len,) = _HEADER_LEN.unpack(fh.read(_HEADER_LEN.size))
+        header = marshal.loads(fh.read(header_len))
+    meta, state = header['meta'], header['state']
+
+    offsets_start = len(MAGIC) + _HEADER_LEN.size + header_len
+    offsets_start += -offsets_start % 8
+    count = meta['rows']
+    blob_start = offsets_start + 8 * (count + 1)
+    state['descriptions'] = MappedStrings(path, offsets_start, count, blob_start)
+    return meta, state
+
+
+def _source_meta(csv_path, sha256=None):
+    stat = os.stat(csv_path)
+    return {
+        'version': ARTIFACT_VERSION,
+        'source': os.path.abspath(csv_path),
+        'source_size': stat.st_size,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_sha256': sha256 or file_sha256(csv_path),
+    }
+
+
+def compile_dataset(csv_path, path=None):
+    """Parse the CSV, build the index and write the artifact. Returns the index."""
+    path = path or artifact_path(csv_path)
+    meta = _source_meta(csv_path)
+    index = SectionIndex(load_ipc_data(csv_path))
+    meta['rows'] = len(index)
+    write_artifact(path, index, meta)
+    return index
+
+
+def load_index(csv_path, path=None):
+    """Load the index for csv_path from its artifact, compiling it if stale.
+
+    Size and mtime are checked first; only if they changed (or the artifact
+    was built from a CSV at another path) is the CSV hashed, so an untouched
+    dataset costs one stat() and the artifact read. Without the CSV an
+    artifact built from this same path is used as it is.
+    """
+    path = path or artifact_path(csv_path)
+    try:
+        meta, state = read_artifact(path)
+    except (OSError, ValueError, EOFError, KeyError):
+        meta = state = None
+
+    if meta is not None and meta.get('version') == ARTIFACT_VERSION:
+        # $FIR_IPC_ARTIFACT names one file whatever the CSV, so it may hold
+        # another dataset's index
+        same_source = meta.get('source') == os.path.abspath(csv_path)
+        try:
+            stat = os.stat(csv_path)
+        except OSError:
+            stat = None
+        if stat is None:
+            if same_source:
+                # Only the artifact was shipped (or the CSV is unreachable): serve it as built
+                return SectionIndex.from_state(state)
+        elif same_source and (stat.st_size, stat.st_mtime_ns) == (meta['source_size'], meta['source_mtime_ns']):
+            return SectionIndex.from_state(state)
+        elif file_sha256(csv_path) == meta['source_sha256']:
+            # Touched, moved or copied but unchanged: refresh the stored
+            # path and mtime, keep the index
+            index = SectionIndex.from_state(state)
+            new_meta = dict(_source_meta(csv_path, meta['source_sha256']), rows=meta['rows'])
+            _try_write(path, index, new_meta)
+            return index
+
+    try:
+        return compile_dataset(csv_path, path)
+    except OSError:
+        # Read-only location: still serve the index, just without the artifact
+        return SectionIndex(load_ipc_data(csv_path))
+
+
+def _try_write(path, index, meta):
+    try:
+        write_artifact(path, index, meta)
+    except OSError:
+        pass
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_section_index(csv_path=None):
+    """One shared, read-only index per dataset path for the whole process"""
+    csv_path = dataset_path(csv_path)
+    index = _indexes.get(csv_path)
+    if index is None:
+        with _indexes_lock:
+            index = _indexes.get(csv_path)
+            if index is None:
+                index = _indexes[csv_path] = load_index(csv_path)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m fir_core',
+                                     description="Compile the IPC dataset into a fast-loading artifact.")
+    parser.add_argument('command', choices=['compile', 'info'])
+    parser.add_argument('csv', nargs='?', help="IPC dataset CSV (default: $FIR_IPC_DATASET)")
+    parser.add_argument('-o', '--output', help="artifact path (default: next to the CSV)")
+    args = parser.parse_args(argv)
+
+    csv_path = dataset_path(args.csv)
+    path = args.output or artifact_path(csv_path)
+    if args.command == 'compile':
+        index = compile_dataset(csv_path, path)
+        print(f"Compiled {len(index)} sections from {csv_path} into {path}")
+    else:
+        meta, _ = read_artifact(path)
+        for key, value in meta.items():
+            print(f"{key}: {value}")
+    return 0
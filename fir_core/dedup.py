@@ -0,0 +1,190 @@
+"""Near-duplicate FIR detection with MinHash signatures and LSH.
+
+The same incident often arrives more than once: several complainants, a
+re-typed copy, an OCR'd scan next to the typed original. minhash() turns a
+FIR into a fixed-size signature over its character shingles; two signatures agree
+in roughly the same fraction of positions as the FIRs' shingle sets overlap
+(Jaccard similarity). LshIndex splits signatures into bands and only
+compares FIRs that share a band bucket, so a lookup costs a handful of
+dictionary probes however large the corpus is. fir_core.store keeps the same
+buckets in SQLite for corpora that don't fit in memory.
+
+Text is lowercased, reduced to single-spaced words and OCR confusions are
+folded (0/o, 1/l/i, 5/s) before shingling. Character 5-grams rather than
+word n-grams keep a misread letter from breaking whole shingles, so a scan
+and its typed version still agree.
+
+Requires numpy.
+"""
+
+import hashlib
+import re
+import threading
+
+import numpy as np
+
+from .fuzzy import SKELETON
+
+NUM_PERM = 128
+BANDS = 16
+SHINGLE_SIZE = 5
+
+# Estimated Jaccard similarity from which two FIRs count as duplicates
+DEFAULT_THRESHOLD = 0.8
+
+# Shingles hashed per numpy block, so huge documents don't allocate
+# shingles x permutations at once
+_BLOCK = 4096
+_EMPTY = 0xFFFFFFFF
+
+WORD_PATTERN = re.compile(r'[^\W_]+')
+
+
+def normalize(text):
+    return " ".join(WORD_PATTERN.findall(text.lower().translate(SKELETON)))
+
+
+def shingles(text, size=SHINGLE_SIZE):
+    """Distinct character shingles of the normalised text, for inspection"""
+    normal = normalize(text)
+    if len(normal) <= size:
+        return {normal} if normal else set()
+    return {normal[i:i + size] for i in range(len(normal) - size + 1)}
+
+
+def shingle_ids(text, size=SHINGLE_SIZE):
+    """Distinct shingles as integers: `size` bytes of the normalised UTF-8
+    text packed into a uint64, so no per-shingle hashing runs in Python.
+
+    For ASCII text a byte shingle is a character shingle; other scripts get
+    shingles of the same width in bytes, which compare just as well.
+    """
+    data = normalize(text).encode('utf-8')
+    if not data:
+        return np.empty(0, dtype=np.uint64)
+    size = min(size, len(data))
+    count = len(data) - size + 1
+    # Overlapping big-endian 8-byte windows, one per position; shifting out
+    # the bytes past `size` leaves exactly one shingle in each
+    padded = data + bytes(8 - size)
+    windows = np.ndarray((count,), dtype='>u8', buffer=padded, strides=(1,))
+    return np.unique(windows >> np.uint64(8 * (8 - size)))
+
+
+class MinHasher:
+    """Seeded multiply-shift hash family; equal seeds give comparable signatures"""
+
+    def __init__(self, num_perm=NUM_PERM, shingle_size=SHINGLE_SIZE, seed=1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        # Odd 64-bit multipliers; the high 32 bits of a*x + b are the hash
+        self.a = rng.randint(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self.b = rng.randint(0, 1 << 63, num_perm, dtype=np.uint64)
+
+    def signature(self, text):
+        """uint32 array of num_perm minimum hashes"""
+        signature = np.full(self.num_perm, _EMPTY, dtype=np.uint64)
+        ids = shingle_ids(text, self.shingle_size)
+        for start in range(0, len(ids), _BLOCK):
+            hashed = ids[start:start + _BLOCK, None] * self.a
+            hashed += self.b
+            hashed >>= np.uint64(32)
+            np.minimum(signature, hashed.min(axis=0), out=signature)
+        return signature.astype(np.uint32)
+
+
+_default_hasher = None
+
+
+def minhash(text):
+    """Signature of text with the default, process-wide hash family"""
+    global _default_hasher
+    if _default_hasher is None:
+        _default_hasher = MinHasher()
+    return _default_hasher.signature(text)
+
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return float(np.count_nonzero(np.asarray(a) == np.asarray(b))) / len(a)
+
+
+def is_blank(signature):
+    """True for the signature of a text without any shingles, which matches nothing"""
+    return bool((np.asarray(signature) == _EMPTY).all())
+
+
+def band_hashes(signature, bands=BANDS):
+    """One stable 64-bit bucket id per band (stable across processes, for storage)"""
+    data = np.ascontiguousarray(signature, dtype=np.uint32)
+    rows = len(data) // bands
+    return [int.from_bytes(hashlib.blake2b(data[i * rows:(i + 1) * rows].tobytes(),
+                                           digest_size=8).digest(), 'little', signed=True)
+            for i in range(bands)]
+
+
+class LshIndex:
+    """In-memory banded LSH over MinHash signatures.
+
+    add() files a signature under one bucket per band; query() compares only
+    against FIRs sharing at least one bucket and returns those at or above
+    the threshold, most similar first. Thread-safe.
+    """
+
+    def __init__(self, bands=BANDS, threshold=DEFAULT_THRESHOLD):
+        self.bands = bands
+        self.threshold = threshold
+        self._buckets = [{} for _ in range(bands)]
+        self._keys = []
+        self._signatures = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def add(self, key, signature):
+        signature = np.asarray(signature, dtype=np.uint32)
+        with self._lock:
+            position = len(self._keys)
+            self._keys.append(key)
+            self._signatures.append(signature.tobytes())
+            for buckets, bucket in zip(self._buckets, band_hashes(signature, self.bands)):
+                # Most buckets hold one FIR; only collisions pay for a list
+                existing = buckets.get(bucket)
+                if existing is None:
+                    buckets[bucket] = position
+                elif isinstance(existing, list):
+                    existing.append(position)
+                else:
+                    buckets[bucket] = [existing, position]
+
+    def query(self, signature, threshold=None, limit=5):
+        """[(key, similarity)] of indexed FIRs at least `threshold` similar"""
+        threshold = self.threshold if threshold is None else threshold
+        signature = np.asarray(signature, dtype=np.uint32)
+        if is_blank(signature):
+            return []
+        candidates = set()
+        with self._lock:
+            for buckets, bucket in zip(self._buckets, band_hashes(signature, self.bands)):
+                found = buckets.get(bucket)
+                if found is None:
+                    continue
+                if isinstance(found, list):
+                    candidates.update(found)
+                else:
+                    candidates.add(found)
+            stored = [(self._keys[p], self._signatures[p]) for p in candidates]
+
+        matches = []
+        for key, raw in stored:
+            score = similarity(signature, np.frombuffer(raw, dtype=np.uint32))
+            if score >= threshold:
+                matches.append((key, score))
+        matches.sort(key=lambda m: -m[1])
+        return matches[:limit]
+
+    def best_match(self, signature, threshold=None):
+        matches = self.query(signature, threshold, limit=1)
+        return matches[0] if matches else None
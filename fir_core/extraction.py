@@ -0,0 +1,106 @@
+"""Concurrent text extraction for a bundle of uploaded documents.
+
+A case file is often a stack of scanned pages and a few PDFs. extract_many()
+extracts them all at once on a bounded thread pool: PDF parsing, text
+decoding and OCR calls overlap, so the bundle takes about as long as its
+slowest document rather than the sum of all of them. Events come back on the
+caller's thread, which is what Streamlit needs to update the page:
+
+    for position, event, value in extract_many(files):
+        if event == 'progress':   # value = (pages_done, page_count), PDFs only
+            ...
+        elif event == 'done':     # value = extracted text
+            ...
+        else:                     # 'error', value = the exception
+            ...
+
+files are (name, mime_type, data) tuples. Every file gets exactly one
+'done' or 'error' event.
+"""
+
+import os
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from .ocr import ocr_image
+from .pdf import iter_pdf_chunks, pypdf_available
+
+EXTRACT_CONCURRENCY_ENV = 'FIR_EXTRACT_CONCURRENCY'
+DEFAULT_CONCURRENCY = 4
+
+PDF_TYPES = ('application/pdf',)
+IMAGE_TYPES = ('image/png', 'image/jpeg', 'image/jpg')
+TEXT_TYPES = ('text/plain',)
+
+_SUFFIX_TYPES = {'.pdf': 'application/pdf', '.png': 'image/png', '.jpg': 'image/jpeg',
+                 '.jpeg': 'image/jpeg', '.txt': 'text/plain'}
+
+
+class ExtractionError(Exception):
+    """A document could not be turned into text"""
+
+
+def file_kind(name, mime_type=None):
+    """'pdf', 'image', 'text' or None; falls back to the file suffix"""
+    if not mime_type:
+        mime_type = _SUFFIX_TYPES.get(os.path.splitext(name)[1].lower())
+    if mime_type in PDF_TYPES:
+        return 'pdf'
+    if mime_type in IMAGE_TYPES:
+        return 'image'
+    if mime_type in TEXT_TYPES:
+        return 'text'
+    return None
+
+
+def extract_text(name, mime_type, data, progress=None, pdf_workers=None):
+    """Text of one document. progress(pages_done, page_count) is called per
+    PDF page; pdf_workers bounds the page pool of a PDF."""
+    kind = file_kind(name, mime_type)
+    if kind == 'text':
+        return data.decode('utf-8', errors='replace')
+    if kind == 'pdf':
+        if not pypdf_available():
+            raise ExtractionError("PyPDF not installed. Cannot extract text from PDF.")
+        return "".join(iter_pdf_chunks(data, workers=pdf_workers, progress=progress))
+    if kind == 'image':
+        # Shrunk and tiled before upload when Pillow is available
+        return ocr_image(name, data)[0]
+    raise ExtractionError(f"Unsupported file type: {mime_type or name}")
+
+
+def extract_many(files, max_workers=None):
+    """Extract several documents concurrently; yields (position, event, value)
+    on the calling thread as things happen (see the module docstring)."""
+    files = list(files)
+    if not files:
+        return
+    max_workers = max_workers or int(os.environ.get(EXTRACT_CONCURRENCY_ENV, DEFAULT_CONCURRENCY))
+    workers = max(1, min(max_workers, len(files)))
+    # Several PDFs at once share the cores instead of each starting a full page pool
+    pdf_workers = max(1, (os.cpu_count() or 1) // workers)
+    events = queue.SimpleQueue()
+
+    def run(position, name, mime_type, data):
+        def progress(done, total):
+            events.put((position, 'progress', (done, total)))
+        try:
+            text = extract_text(name, mime_type, data, progress, pdf_workers)
+        except Exception as e:
+            events.put((position, 'error', e))
+        else:
+            events.put((position, 'done', text))
+
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='extract')
+    try:
+        for position, (name, mime_type, data) in enumerate(files):
+            pool.submit(run, position, name, mime_type, data)
+        remaining = len(files)
+        while remaining:
+            event = events.get()
+            if event[1] != 'progress':
+                remaining -= 1
+            yield event
+    finally:
+        # Also reached when the consumer stops early: drop queued files
+        pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,212 @@
+"""OCR-noise-tolerant matching: repair FIR text before it is matched.
+
+Scanned FIRs come back from OCR as "Sectlon 3O2", "murdr" or "u/s 42O", which
+the exact citation patterns and title-word checks miss. FuzzyCorrector
+rewrites such tokens to the closest known section number or vocabulary word
+so the normal matcher can find them:
+
+1. tokens with a digit whose letters are typical confusions (O/0, l/I/1,
+   S/5, B/8, Z/2) become a number if that number is a known section;
+2. every other token is reduced to a confusion skeleton (0->o, 1/i->l,
+   5->s, 8->b) and looked up exactly, which fixes "Sectlon" or "1PC";
+3. longer tokens fall back to a character-trigram index over the skeletons
+   of the vocabulary, with candidates verified by a bounded edit distance.
+
+Tokens that are already real words (any word of the dataset, or a common
+English word of FIR narratives) are left alone: "stole" is not a misread
+"stolen". Only the remaining tokens are looked up, and every answer is
+memoised, so a FIR costs little more than one pass of re.sub.
+"""
+
+import re
+import threading
+
+from .index import BOOST_TERMS
+
+# Words the citation patterns rely on
+CITATION_WORDS = ('section', 'under', 'ipc')
+
+TOKEN_PATTERN = re.compile(r'[a-z0-9|]+')
+WORD_PATTERN = re.compile(r'[a-z]+')
+
+# Letters OCR reads in place of digits, used for tokens that hold a digit
+DIGIT_CONFUSIONS = str.maketrans({'o': '0', 'q': '0', 'd': '0', 'l': '1', 'i': '1', '|': '1',
+                                  's': '5', 'b': '8', 'z': '2', 'g': '6'})
+
+# Characters folded together before comparing words
+SKELETON = str.maketrans({'0': 'o', '1': 'l', 'i': 'l', '|': 'l', '5': 's', '8': 'b', '2': 'z'})
+
+# Section numbers may carry one letter suffix ("304B")
+SECTION_SUFFIXES = 'abcde'
+
+# Everyday words of FIR narratives, kept as written even when they are a
+# letter or two from a dataset word
+COMMON_WORDS = frozenset('''
+    about accused after again against all also along another any arrested asked assault assaulted
+    attack attacked away back bag beat beaten been before being between blood body broke broken
+    brother brought called came car cash caught cheat cheated child children complainant complaint
+    could cousin daughter day dead death died door down driver during each entered escaped evening
+    father fell fled found friend from gave girl gold gone hand happened having head heard help her
+    him himself his home hospital hours house hurt husband injured injuries inside into
+    jewellery kept kill killed knife known later left lock locked made man many mobile money morning
+    mother near neighbour never night nothing number occurred office officer other outside over paid
+    person phone police present property ran reached received reported road room said same saw
+    scooter seen shop shot shouted sister snatched some someone son stabbed station steal stealing
+    stick stole stolen stone street struck taken than that their them then there these they thief
+    this those threat threaten threatened threw through told took town under unknown vehicle
+    victim village wallet want wanted was were when where which while who whom wife with woman women
+    work would years
+'''.split())
+
+# Tokens shorter than this are only matched through their skeleton
+MIN_FUZZY_LENGTH = 5
+MAX_CACHE = 100_000
+
+
+def skeleton(word):
+    return word.translate(SKELETON)
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance(length):
+    return 1 if length < 8 else 2
+
+
+def bounded_levenshtein(a, b, limit):
+    """Edit distance between a and b, or limit + 1 once it must exceed limit"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            current.append(cost)
+            if cost < best:
+                best = cost
+        if best > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class FuzzyCorrector:
+    """Trigram and confusion-skeleton lookup over one SectionIndex"""
+
+    def __init__(self, index):
+        self.index = index
+        self.numbers = set(index.by_number)
+        self.vocabulary = set(index.vocabulary) | set(BOOST_TERMS) | set(CITATION_WORDS)
+
+        # Real words are never corrected, only garbled ones
+        self.dictionary = set(self.vocabulary) | COMMON_WORDS
+        for text in (*index.title_lowers, *index.descriptions):
+            self.dictionary.update(WORD_PATTERN.findall(str(text).lower()))
+
+        # Skeleton -> word; on collisions the shorter (then alphabetically first) word wins
+        self.skeletons = {}
+        for word in sorted(self.vocabulary, key=lambda w: (len(w), w)):
+            self.skeletons.setdefault(skeleton(word), word)
+
+        self.by_trigram = {}
+        for key in self.skeletons:
+            for gram in trigrams(key):
+                self.by_trigram.setdefault(gram, []).append(key)
+
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def correct(self, text):
+        """Return text with OCR-garbled section numbers and keywords repaired (lowercased)"""
+        return TOKEN_PATTERN.sub(self._replace, text.lower())
+
+    def _replace(self, match):
+        token = match.group()
+        if token in self.dictionary or token in self.numbers:
+            return token
+        fixed = self._cache.get(token)
+        if fixed is None:
+            fixed = self.correct_token(token)
+            with self._lock:
+                if len(self._cache) >= MAX_CACHE:
+                    self._cache.clear()
+                self._cache[token] = fixed
+        return fixed
+
+    def correct_token(self, token):
+        if token.isdigit():
+            # A plain number that isn't a section stays as it is
+            return token
+        if any(c.isdigit() for c in token):
+            number = self._as_section_number(token)
+            if number is not None:
+                return number
+
+        key = skeleton(token)
+        word = self.skeletons.get(key)
+        if word is not None:
+            return word
+        if len(key) >= MIN_FUZZY_LENGTH and not key.isdigit():
+            word = self._nearest(key)
+            if word is not None:
+                return word
+        return token
+
+    def _as_section_number(self, token):
+        head, tail = token[:-1], token[-1]
+        if tail in SECTION_SUFFIXES:
+            if head.isdigit():
+                # Well-formed "24b": a suffix, not a misread "248"
+                return None
+            # Keep a trailing letter as the section suffix ("3O4b" -> "304b")
+            head = head.translate(DIGIT_CONFUSIONS)
+            if head.isdigit() and head + tail in self.numbers:
+                return head + tail
+        digits = token.translate(DIGIT_CONFUSIONS)
+        if digits.isdigit() and digits in self.numbers:
+            return digits
+        return None
+
+    def _nearest(self, key):
+        limit = max_distance(len(key))
+        grams = trigrams(key)
+        # One edit destroys at most three trigrams
+        needed = len(grams) - 3 * limit
+        if needed <= 0:
+            return None
+        shared = {}
+        for gram in grams:
+            for candidate in self.by_trigram.get(gram, ()):
+                shared[candidate] = shared.get(candidate, 0) + 1
+
+        best = None
+        for candidate, count in shared.items():
+            if count < needed or abs(len(candidate) - len(key)) > limit:
+                continue
+            distance = bounded_levenshtein(key, candidate, limit)
+            if distance > limit:
+                continue
+            rank = (distance, -count, candidate)
+            if best is None or rank < best[0]:
+                best = (rank, candidate)
+        return self.skeletons[best[1]] if best else None
+
+
+_correctors = {}
+_correctors_lock = threading.Lock()
+
+
+def get_corrector(index):
+    """One corrector per dataset for the whole process"""
+    corrector = _correctors.get(index.fingerprint)
+    if corrector is None:
+        with _correctors_lock:
+            corrector = _correctors.get(index.fingerprint)
+            if corrector is None:
+                corrector = _correctors[index.fingerprint] = FuzzyCorrector(index)
+    return corrector
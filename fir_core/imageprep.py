@@ -0,0 +1,167 @@
+"""Shrink scanned FIR images before they are uploaded for OCR.
+
+Phone photos of an FIR are 5-12 MB of colour JPEG at a resolution no OCR
+engine needs. prepare_image() turns one into upload-sized tiles:
+
+1. decode, and rotate according to the EXIF orientation tag
+2. downscale so a page is at most `dpi` dots per inch wide (A4 assumed)
+3. convert to grayscale, or binarise with an Otsu threshold
+4. split very tall scans (several pages photographed or stitched together)
+   into page-sized tiles, cutting along the blankest row near each boundary,
+   so the tiles can be OCR'd in parallel
+5. recompress (JPEG for grayscale, PNG for binary), lowering quality and
+   then resolution until each tile fits `max_bytes`; tiles that cannot be
+   shrunk that far without losing legibility are counted in the report
+
+Every stage is timed, and the report carries bytes and pixel sizes before and
+after:
+
+    tiles, report = prepare_image(data, 'fir.jpg')
+    tiles   -> [('fir-1.jpg', b'...'), ...]
+    report  -> {'bytes_in': 8412330, 'bytes_out': 231877, 'tiles': 1, 'over_budget': 0,
+                'size_in': (3024, 4032), 'size_out': (1654, 2205),
+                'stages_ms': {'decode': ..., 'orient': ..., ...}}
+
+Requires Pillow, imported on first use; check pillow_available() first.
+"""
+
+import importlib.util
+import io
+import os
+
+from .metrics import StageTimer
+
+TARGET_DPI = 200
+# A4 portrait, in inches
+PAGE_WIDTH_IN = 8.27
+PAGE_HEIGHT_IN = 11.69
+
+# The free OCR.space tier rejects uploads above 1 MB
+MAX_UPLOAD_BYTES = 1024 * 1024
+
+# Scans taller than this many page heights are tiled
+TILE_MIN_PAGES = 1.5
+# Cuts move at most this fraction of a page to find a blank row
+CUT_SEARCH = 0.1
+
+JPEG_QUALITIES = (75, 60, 45)
+
+
+def pillow_available():
+    """True if Pillow is installed, without importing it"""
+    return importlib.util.find_spec('PIL') is not None
+
+
+def prepare_image(data, filename='scan', dpi=TARGET_DPI, mode='gray', max_bytes=MAX_UPLOAD_BYTES,
+                  tile=True, timer=None):
+    """Return (tiles, report) for image bytes; tiles is [(filename, bytes)].
+
+    mode is 'gray' or 'binary'. Stage timings are also added to `timer`
+    (a fir_core.metrics.StageTimer) as image_<stage>, if one is given.
+    """
+    from PIL import Image, ImageOps
+
+    stages = StageTimer(registry=None)
+    report = {'bytes_in': len(data)}
+
+    max_width = round(PAGE_WIDTH_IN * dpi)
+    with stages.stage('decode'):
+        image = Image.open(io.BytesIO(data))
+        report['size_in'] = image.size
+        # JPEGs can be decoded straight to grayscale at 1/2, 1/4 or 1/8 scale;
+        # square, because orientation may still swap width and height
+        image.draft('L', (max_width, max_width))
+        image.load()
+    with stages.stage('orient'):
+        image = ImageOps.exif_transpose(image)
+
+    with stages.stage('downscale'):
+        if image.width > max_width:
+            height = max(1, round(image.height * max_width / image.width))
+            image = image.resize((max_width, height), Image.LANCZOS, reducing_gap=2.0)
+
+    with stages.stage(mode):
+        image = image.convert('L')
+        if mode == 'binary':
+            threshold = otsu_threshold(image.histogram())
+            image = image.point(lambda p: 255 if p > threshold else 0, mode='1')
+        report['size_out'] = image.size
+
+    with stages.stage('tile'):
+        parts = split_tall(image) if tile else [image]
+
+    with stages.stage('encode'):
+        stem, _ = os.path.splitext(os.path.basename(filename))
+        suffix = '.png' if mode == 'binary' else '.jpg'
+        tiles = []
+        for number, part in enumerate(parts, 1):
+            name = f"{stem}-{number}{suffix}" if len(parts) > 1 else f"{stem}{suffix}"
+            tiles.append((name, _encode(part, mode, max_bytes)))
+
+    report['tiles'] = len(tiles)
+    report['bytes_out'] = sum(len(blob) for _, blob in tiles)
+    report['over_budget'] = sum(len(blob) > max_bytes for _, blob in tiles)
+    report['stages_ms'] = {name: round(s * 1000, 3) for name, s in stages.stages.items()}
+    if timer is not None:
+        for name, seconds in stages.stages.items():
+            timer.add(f"image_{name}", seconds)
+    return tiles, report
+
+
+def otsu_threshold(histogram):
+    """Gray level that best separates ink from paper in a 256-bin histogram"""
+    total = sum(histogram)
+    weighted_total = sum(i * count for i, count in enumerate(histogram))
+    background = weighted = 0
+    best, threshold = -1.0, 127
+    for level, count in enumerate(histogram):
+        background += count
+        if not background:
+            continue
+        foreground = total - background
+        if not foreground:
+            break
+        weighted += level * count
+        mean_back = weighted / background
+        mean_fore = (weighted_total - weighted) / foreground
+        spread = background * foreground * (mean_back - mean_fore) ** 2
+        if spread > best:
+            best, threshold = spread, level
+    return threshold
+
+
+def split_tall(image):
+    """Cut a scan several pages tall into page-sized tiles, along blank rows"""
+    page_height = round(image.width * PAGE_HEIGHT_IN / PAGE_WIDTH_IN)
+    if image.height < page_height * TILE_MIN_PAGES:
+        return [image]
+
+    from PIL import Image
+
+    # Mean brightness of every row, via a one-pixel-wide box resize
+    rows = list(image.convert('L').resize((1, image.height), Image.BOX).getdata())
+    search = max(1, round(page_height * CUT_SEARCH))
+    cuts = [0]
+    while image.height - cuts[-1] >= page_height * TILE_MIN_PAGES:
+        target = cuts[-1] + page_height
+        window = range(max(cuts[-1] + 1, target - search), min(image.height - 1, target + search))
+        cuts.append(max(window, key=lambda y: (rows[y], -abs(y - target))))
+    cuts.append(image.height)
+    return [image.crop((0, top, image.width, bottom)) for top, bottom in zip(cuts, cuts[1:])]
+
+
+def _encode(image, mode, max_bytes):
+    while True:
+        if mode == 'binary':
+            buffer = io.BytesIO()
+            image.save(buffer, 'PNG', optimize=True)
+        else:
+            for quality in JPEG_QUALITIES:
+                buffer = io.BytesIO()
+                image.save(buffer, 'JPEG', quality=quality, optimize=True)
+                if buffer.tell() <= max_bytes:
+                    break
+        if buffer.tell() <= max_bytes or image.width < 600:
+            # Small enough that shrinking further would cost legibility
+            return buffer.getvalue()
+        image = image.resize((image.width * 4 // 5, image.height * 4 // 5))
@@ -0,0 +1,143 @@
+"""Section lookup tables over the IPC dataset."""
+
+import threading
+
+from .automaton import KeywordAutomaton
+from .cache import content_key
+from .sections import SectionRecord, intern_str
+
+
+# Common stopwords to ignore in title analysis
+IGNORE_WORDS = {'punishment', 'for', 'of', 'act', 'code', 'section', 'to', 'in', 'or', 'and', 'the', 'a', 'an', 'causing', 'voluntarily', 'from', 'by', 'sale', 'etc'}
+
+# Title terms that get an extra boost when they also appear in the FIR
+BOOST_TERMS = ('murder', 'rape', 'dacoity')
+
+_records_lock = threading.Lock()
+
+
+class SectionIndex:
+    """Lookup tables over the IPC dataset, built once per loaded DataFrame.
+
+    Holds the lowercased section numbers and filtered title words for every
+    row, a section-number -> rows map and a title-keyword -> rows inverted
+    index, so matching only has to score rows the FIR can actually hit.
+
+    The index is read-only once built: every session and thread shares it,
+    and its SectionRecords, instead of taking copies.
+    """
+
+    def __init__(self, dataframe):
+        n_rows = len(dataframe)
+
+        columns = getattr(dataframe, 'columns', ())
+
+        def column(name):
+            if name in columns:
+                return dataframe[name].tolist()
+            return [''] * n_rows
+
+        # Empty cells come back from pandas as NaN; treat them as empty text
+        self.sections = [intern_str(s) for s in column('Section')]
+        self.titles = [intern_str(_text_cell(t)) for t in column('Title')]
+        self.descriptions = [_text_cell(d) for d in column('Description')]
+
+        self.section_keys = [str(s).strip().lower() for s in self.sections]
+        self.title_lowers = [str(t).lower() for t in self.titles]
+
+        # Title words that can confirm a loose number match (len > 3) and the
+        # stricter set used for pure keyword matches (len > 4). Lists, not
+        # sets: a repeated title word counts twice, as it always has.
+        self.number_words = []
+        self.keyword_words = []
+
+        self.by_number = {}
+        self.by_word = {}
+        self.by_boost = {term: [] for term in BOOST_TERMS}
+        self.vocabulary = set()
+
+        for row_id, (section, title) in enumerate(zip(self.section_keys, self.title_lowers)):
+            words = [w for w in title.split() if w not in IGNORE_WORDS and len(w) > 3]
+            strict_words = [w for w in words if len(w) > 4]
+            self.number_words.append(words)
+            self.keyword_words.append(strict_words)
+
+            self.by_number.setdefault(section, []).append(row_id)
+            for word in set(words):
+                self.by_word.setdefault(word, []).append(row_id)
+            for term in BOOST_TERMS:
+                if term in title:
+                    self.by_boost[term].append(row_id)
+            self.vocabulary.update(words)
+
+        self.automaton = KeywordAutomaton(sorted(self.vocabulary) + list(BOOST_TERMS))
+
+        # Identifies this dataset in cache keys, so cached analyses are never
+        # served against a different statute table
+        self.fingerprint = content_key(*self.section_keys, *self.title_lowers,
+                                       *map(str, self.descriptions))
+
+    def __len__(self):
+        return len(self.section_keys)
+
+    def to_state(self):
+        """Plain containers only (lists, dicts, sets, str, int), for marshal"""
+        state = {key: value for key, value in vars(self).items() if not key.startswith('_')}
+        state['automaton'] = dict(vars(self.automaton))
+        return state
+
+    @classmethod
+    def from_state(cls, state):
+        index = cls.__new__(cls)
+        vars(index).update(state)
+        automaton = KeywordAutomaton.__new__(KeywordAutomaton)
+        vars(automaton).update(state['automaton'])
+        index.automaton = automaton
+        return index
+
+    @property
+    def records(self):
+        """One shared SectionRecord per row, built on first use"""
+        records = self.__dict__.get('_records')
+        if records is None:
+            with _records_lock:
+                records = self.__dict__.get('_records')
+                if records is None:
+                    # Strings from the artifact aren't interned; intern them
+                    # here so records and the index columns share one copy
+                    self.sections = [intern_str(s) for s in self.sections]
+                    self.titles = [intern_str(t) for t in self.titles]
+                    records = self._records = [
+                        SectionRecord(row_id, section, title, self.descriptions)
+                        for row_id, (section, title) in enumerate(zip(self.sections, self.titles))
+                    ]
+        return records
+
+    def find_words(self, text_lower):
+        """Return the title words and boost terms that occur anywhere in the text.
+
+        One automaton pass over the FIR finds them all, so the cost grows with
+        the length of the FIR and not with the size of the vocabulary.
+        """
+        return self.automaton.find(text_lower)
+
+    def candidates(self, section_numbers, found_words):
+        """Row ids that can reach the score threshold, in dataset order"""
+        rows = set()
+        for number in section_numbers:
+            rows.update(self.by_number.get(number, ()))
+        for word in found_words:
+            rows.update(self.by_word.get(word, ()))
+        for term, term_rows in self.by_boost.items():
+            if term in found_words:
+                rows.update(term_rows)
+        return sorted(rows)
+
+
+def _text_cell(value):
+    if isinstance(value, str):
+        return value
+    # NaN (and pandas' NA, which isn't equal to itself either) means an empty cell
+    if value is None or value != value:
+        return ''
+    return str(value)
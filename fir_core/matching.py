@@ -0,0 +1,415 @@
+"""Scoring IPC sections against FIR text, all at once, chunk by chunk or edit by edit."""
+
+import bisect
+import re
+from collections import Counter
+
+from .fuzzy import get_corrector
+from .index import BOOST_TERMS, SectionIndex
+from .sections import SectionMatch
+
+
+# Extract HIGH CONFIDENCE section numbers using strict context patterns
+# Patterns: "Section 302", "Sec 302", "u/s 302", "IPC 302", "302 IPC"
+# we use \b to ensure we don't match 1302 as 302
+CITATION_PATTERN = re.compile(r'(?:section|sec|u/s|under section)\.?\s*(\d+[a-zA-Z]?)')
+IPC_SUFFIX_PATTERN = re.compile(r'(\d+[a-zA-Z]?)\s*ipc')
+NUMBER_PATTERN = re.compile(r'\b\d+[a-zA-Z]?\b')
+
+# Whitespace-separated tokens carried into the next chunk, enough for
+# "under section 302" or "302 IPC" split across a chunk boundary
+CARRY_TOKENS = 3
+CARRY_MAX_CHARS = 256
+
+# The unfinished token at the end of a chunk
+TRAILING_TOKEN = re.compile(r'\S*\Z')
+
+# Where an edited FIR is cut into segments: line breaks, whitespace after
+# sentence or clause punctuation (which also separates the form data fields)
+# and, so that unpunctuated OCR text is cut too, whitespace after a long word.
+# Cuts depend only on the nearby text, so an edit moves none but its own.
+SEGMENT_END = re.compile(r'\n|[.!?;,]\s+|\S{10,}\s+')
+
+
+class SectionMatcher:
+    """Incremental section matching over a FIR that arrives in chunks.
+
+    feed() scans only the new chunk (plus a short tail of the previous one)
+    and rescores only the sections its new citations, numbers or keywords can
+    affect; results() can be called at any point for the ranking so far.
+    However the text is split into chunks, the results are exactly
+    find_matching_sections' for the whole of it.
+
+    With fuzzy=True each chunk is first repaired by fir_core.fuzzy, for OCR
+    output with garbled section numbers and keywords.
+    """
+
+    def __init__(self, index, fuzzy=False):
+        self.index = index
+        self.corrector = get_corrector(index) if fuzzy else None
+        self.explicit_citations = set()
+        self.all_numbers_in_text = set()
+        self.found_words = set()
+        self.scores = {}
+        self.chars_seen = 0
+        self._carry = ""
+        self._pending = ""
+
+    def feed(self, chunk):
+        if not chunk or not len(self.index):
+            return self
+        self.chars_seen += len(chunk)
+        # A chunk can end inside a token ("3" + "02", "Sec" + "tion 420");
+        # the partial token waits for the rest of it in the next chunk
+        text = self._pending + chunk
+        cut = TRAILING_TOKEN.search(text).start()
+        self._pending = text[cut:]
+        if cut:
+            self._carry = self._apply(text[:cut], self.explicit_citations, self.all_numbers_in_text,
+                                      self.found_words, self.scores)
+        return self
+
+    def results(self, limit=8):
+        if not self._pending:
+            return rank_scores(self.index, self.scores, limit)
+        # The last token so far counts, but without committing it: more of
+        # it may still arrive
+        scores = dict(self.scores)
+        self._apply(self._pending, set(self.explicit_citations), set(self.all_numbers_in_text),
+                    set(self.found_words), scores)
+        return rank_scores(self.index, scores, limit)
+
+    def _apply(self, text, explicit_citations, all_numbers_in_text, found_words, scores):
+        """Scan text after the carry into the given sets and rescore what it
+        affects in `scores`; returns the carry for the text after it"""
+        text_lower = self._carry + text.lower()
+        if self.corrector is not None:
+            # The carry is already corrected; correcting it again is a no-op
+            text_lower = self.corrector.correct(text_lower)
+
+        explicit, numbers, words = _scan(self.index, text_lower)
+        new_numbers = (explicit - explicit_citations) | (numbers - all_numbers_in_text)
+        new_words = words - found_words
+        if new_numbers or new_words:
+            explicit_citations |= explicit
+            all_numbers_in_text |= numbers
+            found_words |= new_words
+
+            # Only rows whose number or title keywords just appeared can change score
+            for row_id in self.index.candidates(new_numbers, new_words):
+                score, match_type = score_section(self.index, row_id, explicit_citations,
+                                                  all_numbers_in_text, found_words)
+                if score >= 15: # Minimum score threshold to reduce noise
+                    scores[row_id] = (score, match_type)
+                else:
+                    scores.pop(row_id, None)
+        return _tail_tokens(text_lower)
+
+
+class IncrementalMatcher:
+    """Section matching that follows a FIR as it is edited.
+
+    update() takes the current text, or its parts in order (the narrative
+    and the form data, say), and compares each part with its previous
+    version. Only the segments (lines and clauses, cut at SEGMENT_END)
+    around the changed characters are cut and scanned again, plus the next
+    segment while the tail carried into it differs; a segment that was only
+    moved is found and reused. The citations, numbers and words of every
+    segment are counted, and only sections whose features appeared or
+    disappeared are rescored, so typing into one sentence of a long FIR
+    costs about as much as matching that sentence. results() always equals
+    find_matching_sections on the parts joined together.
+    """
+
+    def __init__(self, index, fuzzy=False):
+        self.index = index
+        self.corrector = get_corrector(index) if fuzzy else None
+        # Feature -> number of segments it occurs in; zero counts are removed,
+        # so `in` works as it does on SectionMatcher's sets
+        self.explicit_citations = Counter()
+        self.all_numbers_in_text = Counter()
+        self.found_words = Counter()
+        self.scores = {}
+        self.segments_rescanned = 0
+        self._parts = []
+        # (carry in, segment text) -> (features, carry out), for every segment
+        self._by_key = {}
+        self._results = {}
+
+    def update(self, parts):
+        if isinstance(parts, str):
+            parts = (parts,)
+        self.segments_rescanned = 0
+        if not len(self.index):
+            return self
+        while len(self._parts) < len(parts):
+            self._parts.append(_Segments())
+
+        removed, added = [], []
+        carry = ""
+        for state, text in zip(self._parts, parts):
+            carry = self._update_part(state, text, carry, removed, added)
+        for state in self._parts[len(parts):]:
+            removed.extend(state.entries)
+            self._forget(state.keys)
+        del self._parts[len(parts):]
+
+        if not removed and not added:
+            return self
+
+        counters = (self.explicit_citations, self.all_numbers_in_text, self.found_words)
+        # Feature -> whether it was present before this update, per counter
+        touched = ({}, {}, {})
+        for entries, sign in ((removed, -1), (added, 1)):
+            for features, _ in entries:
+                for counter, was_present, found in zip(counters, touched, features):
+                    for feature in found:
+                        was_present.setdefault(feature, feature in counter)
+                        counter[feature] += sign
+
+        # Only features that appeared or disappeared can change a score
+        toggled = []
+        for counter, was_present in zip(counters, touched):
+            changed = set()
+            for feature, present in was_present.items():
+                if not counter[feature]:
+                    del counter[feature]
+                if (feature in counter) != present:
+                    changed.add(feature)
+            toggled.append(changed)
+        explicit, numbers, words = toggled
+        if not explicit and not numbers and not words:
+            return self
+
+        self._results.clear()
+        for row_id in self.index.candidates(explicit | numbers, words):
+            score, match_type = score_section(self.index, row_id, self.explicit_citations,
+                                              self.all_numbers_in_text, self.found_words)
+            if score >= 15: # Minimum score threshold to reduce noise
+                self.scores[row_id] = (score, match_type)
+            else:
+                self.scores.pop(row_id, None)
+        return self
+
+    def results(self, limit=8):
+        # Ranking every scored row is the main cost of an edit that changes
+        # nothing; keep it until a score changes
+        results = self._results.get(limit)
+        if results is None:
+            results = self._results[limit] = rank_scores(self.index, self.scores, limit)
+        return list(results)
+
+    def _update_part(self, state, text, carry, removed, added):
+        """Bring one part up to date; returns the carry out of it"""
+        old, ends, keys, entries = state.text, state.ends, state.keys, state.entries
+        carry_in = carry
+        if text == old and carry_in == state.carry:
+            return entries[-1][1] if entries else carry_in
+
+        prefix = _common_prefix(old, text)
+        suffix = _common_suffix(old, text, min(len(old), len(text)) - prefix)
+        shift = len(text) - len(old)
+        unchanged_from = len(text) - suffix
+
+        # Segments ending before the first change keep their cuts: where a
+        # segment ends depends only on the text up to one character past it.
+        # A different carry into the part still changes what the first of
+        # them match, until the carry out of one comes back the same.
+        first = bisect.bisect_left(ends, prefix)
+        start = 0
+        old_carry = state.carry  # the old carry into segment k
+        for k in range(first):
+            if carry == old_carry:
+                carry = entries[first - 1][1]
+                break
+            key, entry = self._scan_segment(carry, text[start:ends[k]])
+            old_carry = entries[k][1]
+            removed.append(entries[k])
+            added.append(entry)
+            self._by_key.pop(keys[k], None)
+            keys[k], entries[k] = key, entry
+            start, carry = ends[k], entry[1]
+        pos = ends[first - 1] if first else 0
+
+        new_ends, new_keys, new_entries = [], [], []
+        last = len(ends)
+        while pos < len(text):
+            if pos >= unchanged_from:
+                # Into the unchanged tail: the old segments take over from a
+                # cut that lines up with an old one, once the carry agrees
+                i = bisect.bisect_left(ends, pos - shift)
+                if i < len(ends) and ends[i] == pos - shift and entries[i][1] == carry:
+                    last = i + 1
+                    break
+            match = SEGMENT_END.search(text, pos)
+            end = match.end() if match else len(text)
+            key, entry = self._scan_segment(carry, text[pos:end])
+            new_ends.append(end)
+            new_keys.append(key)
+            new_entries.append(entry)
+            pos, carry = end, entry[1]
+
+        removed.extend(entries[first:last])
+        added.extend(new_entries)
+        self._forget(keys[first:last])
+        self._by_key.update(zip(new_keys, new_entries))
+
+        state.carry = carry_in
+        state.text = text
+        state.ends = ends[:first] + new_ends + [end + shift for end in ends[last:]]
+        keys[first:last] = new_keys
+        entries[first:last] = new_entries
+        return entries[-1][1] if entries else carry_in
+
+    def _scan_segment(self, carry, segment):
+        """(key, entry) for a segment after the given carry, scanned if it is new"""
+        key = (carry, segment)
+        entry = self._by_key.get(key)
+        if entry is None:
+            text_lower = carry + segment.lower()
+            if self.corrector is not None:
+                # The carry is already corrected, as in SectionMatcher.feed
+                text_lower = self.corrector.correct(text_lower)
+            entry = self._by_key[key] = (_scan(self.index, text_lower), _tail_tokens(text_lower))
+            self.segments_rescanned += 1
+        return key, entry
+
+    def _forget(self, keys):
+        for key in keys:
+            self._by_key.pop(key, None)
+
+
+class _Segments:
+    """Segmentation state of one part of the text"""
+
+    __slots__ = ('text', 'carry', 'ends', 'keys', 'entries')
+
+    def __init__(self):
+        self.text = ""
+        self.carry = ""
+        self.ends = []
+        self.keys = []
+        self.entries = []
+
+
+def rank_scores(index, scores, limit=8):
+    """SectionMatch results from {row_id: (score, match_type)}, best first"""
+    records = index.records
+    # Highest score first; ties keep dataset order
+    ranked = sorted(scores.items(), key=lambda item: (-item[1][0], item[0]))
+
+    # Deduplication (Keep highest score for same section)
+    unique_results = []
+    seen_sections = set()
+    for row_id, (score, match_type) in ranked:
+        record = records[row_id]
+        if record.section in seen_sections:
+            continue
+        seen_sections.add(record.section)
+        unique_results.append(SectionMatch(record, score, match_type))
+        if len(unique_results) >= limit:
+            break
+    return unique_results
+
+
+def _common_prefix(a, b):
+    # Binary search comparing only the undecided half, so the slices copied
+    # add up to the length of the strings once
+    lo, hi = 0, min(len(a), len(b))
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[lo:mid] == b[lo:mid]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _common_suffix(a, b, limit):
+    lo, hi = 0, limit
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if a[len(a) - mid:len(a) - lo] == b[len(b) - mid:len(b) - lo]:
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+
+def _scan(index, text_lower):
+    explicit = set(CITATION_PATTERN.findall(text_lower))
+    explicit.update(IPC_SUFFIX_PATTERN.findall(text_lower))
+    numbers = set(NUMBER_PATTERN.findall(text_lower))
+    # Title words and boost terms present in the text, found in one pass
+    words = index.find_words(text_lower)
+    return explicit, numbers, words
+
+
+def _tail_tokens(text):
+    # Start the carry on a whitespace boundary so \b and partial tokens behave
+    # exactly as they would in the unsplit text
+    tail = text[-CARRY_MAX_CHARS:]
+    pos = len(tail)
+    for _ in range(CARRY_TOKENS):
+        while pos and tail[pos - 1].isspace():
+            pos -= 1
+        while pos and not tail[pos - 1].isspace():
+            pos -= 1
+    return tail[pos:]
+
+
+def score_section(index, row_id, explicit_citations, all_numbers_in_text, found_words):
+    """Score one dataset row against the citations, numbers and words seen in a FIR"""
+    section = index.section_keys[row_id]
+    title = index.title_lowers[row_id]
+    
+    score = 0
+    matches_found = []
+    
+    # --- SCORING LOGIC ---
+    
+    # A. Explicit Citation Match (Highest Confidence)
+    if section in explicit_citations:
+        score += 50
+        matches_found.append("Explicit Citation")
+        
+    # B. Loose Number Match + STRONG CONTEXT (Medium Confidence)
+    elif section in all_numbers_in_text:
+        # SANITY CHECK: Ignore small numbers (1-10) or likely years (19XX, 20XX) unless explicit
+        is_likely_year = section.isdigit() and (1950 < int(section) < 2030)
+        is_small_number = section.isdigit() and int(section) < 11
+        
+        if not is_likely_year and not is_small_number:
+            # Require Title Keywords to valid this number
+            matched_keywords = [w for w in index.number_words[row_id] if w in found_words]
+            
+            if len(matched_keywords) >= 1: # At least 1 strong keyword required
+                score += 20 + (len(matched_keywords) * 5)
+                matches_found.append("Number + Keyword")
+    
+    # C. Pure Keyword Match (Low Confidence - but useful if no section numbers mentioned)
+    else:
+        matched_keywords = [w for w in index.keyword_words[row_id] if w in found_words] # Stricter length
+        
+        # Require multiple keywords for pure text match
+        if len(matched_keywords) >= 2:
+            score += (len(matched_keywords) * 5)
+        
+        # Boost for very specific crimes
+        for term in BOOST_TERMS:
+            if term in title and term in found_words: score += 15
+
+    return score, ", ".join(matches_found)
+
+
+# Helper to find sections
+def find_matching_sections(text, dataframe, index=None, fuzzy=False):
+    if index is None:
+        if dataframe is None or dataframe.empty:
+            return []
+        index = SectionIndex(dataframe)
+
+    if not text or not len(index):
+        return []
+
+    return SectionMatcher(index, fuzzy).feed(text).results() # Return top 8 most relevant
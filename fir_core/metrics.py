@@ -0,0 +1,136 @@
+"""Per-stage latency instrumentation for FIR analysis.
+
+A StageTimer records how long each stage of one request took (upload read,
+PDF extraction, OCR, dataset load, section matching, classification,
+rendering). Every observation also goes into a process-wide LatencyRegistry
+that keeps a rolling window per stage and can export p50/p95/p99 in the
+Prometheus text format or append per-request breakdowns to a JSONL log.
+"""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Set to a file path to append one JSON line per request breakdown
+METRICS_LOG_ENV = 'FIR_METRICS_LOG'
+
+
+class LatencyRegistry:
+    """Thread-safe rolling latency samples per stage"""
+
+    def __init__(self, window=2048):
+        self.window = window
+        self._samples = {}
+        self._counts = {}
+        self._sums = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        with self._lock:
+            samples = self._samples.get(stage)
+            if samples is None:
+                samples = self._samples[stage] = deque(maxlen=self.window)
+                self._counts[stage] = 0
+                self._sums[stage] = 0.0
+            samples.append(seconds)
+            self._counts[stage] += 1
+            self._sums[stage] += seconds
+
+    def stages(self):
+        with self._lock:
+            return list(self._samples)
+
+    def summary(self):
+        """Return {stage: {'count', 'sum', 'p50', 'p95', 'p99'}} over the rolling window"""
+        with self._lock:
+            snapshot = {stage: (sorted(samples), self._counts[stage], self._sums[stage])
+                        for stage, samples in self._samples.items()}
+        out = {}
+        for stage, (samples, count, total) in snapshot.items():
+            row = {'count': count, 'sum': total}
+            for q in QUANTILES:
+                row[f"p{int(q * 100)}"] = _quantile(samples, q)
+            out[stage] = row
+        return out
+
+    def to_prometheus(self, metric='fir_stage_latency_seconds'):
+        """Render the summary in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {metric} Latency of FIR analysis stages (rolling window).",
+            f"# TYPE {metric} summary",
+        ]
+        for stage, row in sorted(self.summary().items()):
+            for q in QUANTILES:
+                lines.append(f'{metric}{{stage="{stage}",quantile="{q}"}} {row[f"p{int(q * 100)}"]:.6f}')
+            lines.append(f'{metric}_sum{{stage="{stage}"}} {row["sum"]:.6f}')
+            lines.append(f'{metric}_count{{stage="{stage}"}} {row["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._sums.clear()
+
+
+def _quantile(sorted_samples, q):
+    # Nearest-rank quantile; good enough for a rolling latency window
+    if not sorted_samples:
+        return 0.0
+    rank = max(0, math.ceil(q * len(sorted_samples)) - 1)
+    return sorted_samples[rank]
+
+
+# Shared by every session/thread in the process
+REGISTRY = LatencyRegistry()
+
+
+class StageTimer:
+    """Collects the stage breakdown of a single request"""
+
+    def __init__(self, registry=REGISTRY):
+        self.registry = registry
+        self.stages = {}
+        self.started = time.time()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name, seconds):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+        if self.registry is not None:
+            self.registry.observe(name, seconds)
+
+    def total(self):
+        return sum(self.stages.values())
+
+    def as_dict(self):
+        return {
+            'timestamp': self.started,
+            'total_ms': round(self.total() * 1000, 3),
+            'stages_ms': {name: round(s * 1000, 3) for name, s in self.stages.items()},
+        }
+
+    def log(self, path=None):
+        """Append this breakdown to a JSONL file (default: $FIR_METRICS_LOG, if set)"""
+        path = path or os.environ.get(METRICS_LOG_ENV)
+        if not path or not self.stages:
+            return
+        with open(path, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(self.as_dict()) + "\n")
+
+
+def timed(timer, name):
+    """timer.stage(name), or a no-op when no timer was passed in"""
+    return timer.stage(name) if timer is not None else nullcontext()
@@ -0,0 +1,442 @@
+"""OCR backends for scanned FIRs.
+
+OcrSpaceBackend talks to the OCR.space parse API (or anything that speaks its
+protocol) over a pooled requests.Session with retries and backoff. OcrClient
+runs OCR calls on a shared thread pool with a concurrency limit, so many
+images or pages can be scanned at once without blocking the caller.
+ocr_image() shrinks a photo with fir_core.imageprep first (when Pillow is
+installed) and OCRs the tiles of a tall scan in parallel.
+
+For offline load tests a stand-in server that answers like OCR.space is
+bundled:
+
+    python -m fir_core.ocr serve --port 8765 --latency 300 --bandwidth 500
+    FIR_OCR_URL=http://127.0.0.1:8765/parse/image streamlit run fir_app.py
+    python -m fir_core.ocr loadtest sample.jpg --url http://127.0.0.1:8765/parse/image -n 200 -c 16
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+OCR_SPACE_URL = 'https://api.ocr.space/parse/image'
+
+# Environment overrides, so deployments and load tests can point elsewhere
+OCR_URL_ENV = 'FIR_OCR_URL'
+OCR_API_KEY_ENV = 'FIR_OCR_API_KEY'
+OCR_TIMEOUT_ENV = 'FIR_OCR_TIMEOUT'
+OCR_CONCURRENCY_ENV = 'FIR_OCR_CONCURRENCY'
+# Set to 0 to upload images exactly as received
+OCR_PREPARE_ENV = 'FIR_OCR_PREPARE'
+
+SAMPLE_TEXT = ("FIRST INFORMATION REPORT. The complainant states that the accused "
+               "committed theft of a mobile phone and assaulted him, u/s 379 and 323 IPC.")
+
+
+class OcrError(Exception):
+    """The OCR service answered but could not process the document"""
+
+
+class OcrBackend:
+    """Turns image/PDF bytes into text. Subclasses implement ocr_bytes."""
+
+    def ocr_bytes(self, filename, data):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class OcrSpaceBackend(OcrBackend):
+    """OCR.space protocol over a pooled HTTP session with retries"""
+
+    def __init__(self, url=OCR_SPACE_URL, api_key='helloworld', language='eng', engine=2,
+                 timeout=15, retries=3, backoff=0.5, pool_size=16):
+        self.url = url
+        self.api_key = api_key
+        self.language = language
+        self.engine = engine
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.pool_size = pool_size
+        self._session = None
+        self._lock = threading.Lock()
+
+    @property
+    def session(self):
+        # requests is only imported once OCR is actually used
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+                    from urllib3.util.retry import Retry
+
+                    # The OCR POST is not idempotent: a read timeout or a 5xx
+                    # may come after the image was processed (and billed), so
+                    # only failed connections and explicit "try later"
+                    # answers are retried
+                    retry = Retry(
+                        total=self.retries,
+                        read=0,
+                        backoff_factor=self.backoff,
+                        status_forcelist=(429, 503),
+                        allowed_methods=frozenset(['POST']),
+                        respect_retry_after_header=True,
+                        raise_on_status=False,
+                    )
+                    adapter = HTTPAdapter(max_retries=retry, pool_connections=1,
+                                          pool_maxsize=self.pool_size)
+                    session = requests.Session()
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+
+    def ocr_bytes(self, filename, data):
+        payload = {
+            'isOverlayRequired': False,
+            'apikey': self.api_key,
+            'language': self.language,
+            'OCREngine': self.engine # Engine 2 has better handwriting/text support
+        }
+        r = self.session.post(self.url, files={'file': (filename, data)}, data=payload,
+                              timeout=self.timeout)
+        result = r.json()
+
+        if result.get('IsErroredOnProcessing'):
+            raise OcrError(result.get('ErrorMessage'))
+
+        parsed_results = result.get('ParsedResults')
+        if parsed_results:
+            return parsed_results[0].get('ParsedText') or ""
+        return ""
+
+    def close(self):
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+
+class OcrClient:
+    """Runs OCR calls on a bounded thread pool.
+
+    submit() returns a Future right away; map() scans many documents at once
+    and yields (position, text_or_exception) as each one finishes.
+    """
+
+    def __init__(self, backend, max_concurrency=4):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix='ocr')
+
+    def submit(self, filename, data):
+        return self._pool.submit(self.backend.ocr_bytes, filename, data)
+
+    def ocr(self, filename, data, timeout=None):
+        return self.submit(filename, data).result(timeout=timeout)
+
+    def map(self, items):
+        """items: iterable of (filename, data). Yields in completion order."""
+        futures = {self.submit(name, data): pos for pos, (name, data) in enumerate(items)}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result()
+            except Exception as e:
+                yield futures[future], e
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
+        self.backend.close()
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+# Clients for other API keys or languages, oldest first
+MAX_EXTRA_CLIENTS = 8
+_extra_clients = {}
+
+
+def get_ocr_client(api_key=None, language=None):
+    """Process-wide client configured from the environment.
+
+    Another API key or language gets its own pooled client, created on first
+    use and kept for the next call like the default one.
+    """
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                backend = OcrSpaceBackend(
+                    url=os.environ.get(OCR_URL_ENV, OCR_SPACE_URL),
+                    api_key=os.environ.get(OCR_API_KEY_ENV, 'helloworld'),
+                    timeout=float(os.environ.get(OCR_TIMEOUT_ENV, 15)),
+                )
+                _default_client = OcrClient(backend, int(os.environ.get(OCR_CONCURRENCY_ENV, 4)))
+
+    default = _default_client.backend
+    key = (api_key or default.api_key, language or default.language)
+    if key == (default.api_key, default.language):
+        return _default_client
+    with _default_lock:
+        client = _extra_clients.get(key)
+        if client is None:
+            if len(_extra_clients) >= MAX_EXTRA_CLIENTS:
+                _extra_clients.pop(next(iter(_extra_clients))).shutdown()
+            backend = OcrSpaceBackend(url=default.url, api_key=key[0], language=key[1],
+                                      timeout=default.timeout)
+            client = _extra_clients[key] = OcrClient(backend, _default_client.max_concurrency)
+    return client
+
+
+def prepare_for_ocr(filename, data, timer=None):
+    """(tiles, report) from fir_core.imageprep, or the upload unchanged with
+    report None when Pillow is missing, preparation is switched off or the
+    bytes aren't an image Pillow can read. Raises OcrError if a prepared
+    upload is still over the size limit."""
+    from .imageprep import MAX_UPLOAD_BYTES, pillow_available, prepare_image
+
+    if os.environ.get(OCR_PREPARE_ENV, '1') == '0' or not pillow_available():
+        return [(filename, data)], None
+    try:
+        tiles, report = prepare_image(data, filename, max_bytes=MAX_UPLOAD_BYTES, timer=timer)
+    except Exception:
+        return [(filename, data)], None
+    if len(tiles) == 1 and report['bytes_out'] >= len(data):
+        # Already small (a clean PNG, say); the original reads at least as well
+        report['bytes_out'] = len(data)
+        tiles = [(filename, data)]
+    for name, blob in tiles:
+        if len(blob) > MAX_UPLOAD_BYTES:
+            # The OCR service would only answer with an unexplained error
+            raise OcrError(f"{name} is still {len(blob) / 1024:.0f} KB after shrinking, over the "
+                           f"{MAX_UPLOAD_BYTES // 1024} KB upload limit; crop the scan or photograph "
+                           f"fewer pages at once")
+    return tiles, report
+
+
+def ocr_image(filename, data, client=None, timer=None):
+    """OCR one image through the shared client, shrunk and tiled first.
+
+    Tiles are scanned in parallel and their text joined in page order.
+    Returns (text, report); report is the imageprep report plus the OCR time
+    (stages_ms['ocr']), or None if the image went up unchanged. `timer` gets
+    the image_* preparation stages and the OCR round trips as ocr_call.
+    """
+    client = client or get_ocr_client()
+    tiles, report = prepare_for_ocr(filename, data, timer)
+    start = time.perf_counter()
+    texts = [None] * len(tiles)
+    for position, text in client.map(tiles):
+        if isinstance(text, Exception):
+            raise text
+        texts[position] = text
+    elapsed = time.perf_counter() - start
+    if timer is not None:
+        timer.add('ocr_call', elapsed)
+    if report is not None:
+        report['stages_ms']['ocr'] = round(elapsed * 1000, 3)
+    return "\n".join(texts), report
+
+
+def ocr_space_file(uploaded_file, api_key=None, language='eng', timer=None, reports=None):
+    """OCR an uploaded file through the shared, pooled OCR client.
+
+    Accepts anything with .name and .getvalue() (e.g. a Streamlit UploadedFile)
+    and, as the app always has, returns error messages as text. Images are
+    shrunk before upload; preparation stages are added to `timer`, and the
+    imageprep report (or None) is appended to the `reports` list if given.
+    """
+    try:
+        # Another key or language gets its own pooled client, not the shared one
+        client = get_ocr_client(api_key, language)
+        # Streamlit UploadedFile behaves like a file object
+        text, report = ocr_image(uploaded_file.name, uploaded_file.getvalue(), client, timer)
+        if reports is not None:
+            reports.append(report)
+        return text
+
+    except OcrError as e:
+        return f"Error: {e}"
+    except Exception as e:
+        return f"API Connection Error: {e}"
+
+
+# -----------------------------------------------------------------------------
+# STAND-IN SERVER
+# -----------------------------------------------------------------------------
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        filename, data = _parse_upload(self.headers.get('Content-Type', ''), body)
+
+        delay = server.latency + random.uniform(0, server.jitter)
+        if server.bandwidth:
+            # Time the upload would have taken on a link of that speed
+            delay += len(body) / server.bandwidth
+        if delay:
+            time.sleep(delay)
+
+        if data is None:
+            result = {'IsErroredOnProcessing': True, 'ErrorMessage': ['No file uploaded']}
+        else:
+            result = {'IsErroredOnProcessing': False,
+                      'ParsedResults': [{'ParsedText': server.text_for(filename, data)}]}
+
+        payload = json.dumps(result).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _parse_upload(content_type, body):
+    """Return (filename, bytes) of the 'file' part of a multipart body"""
+    message = BytesParser(policy=HTTP).parsebytes(
+        b"Content-Type: " + content_type.encode('latin-1') + b"\r\n\r\n" + body)
+    if not message.is_multipart():
+        return None, None
+    for part in message.iter_parts():
+        if part.get_param('name', header='content-disposition') == 'file':
+            return part.get_filename() or 'upload', part.get_payload(decode=True)
+    return None, None
+
+
+class StandInOcrServer(ThreadingHTTPServer):
+    """Answers OCR.space-style requests locally.
+
+    The returned text is, in order of preference: a `<filename>.txt` sidecar
+    from `corpus_dir`, the upload itself if it decodes as UTF-8 text, or a
+    fixed sample FIR. `latency`/`jitter` (seconds) simulate the remote API
+    and `bandwidth` (bytes per second, 0 for unlimited) the uplink to it.
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 8765), latency=0.0, jitter=0.0, corpus_dir=None,
+                 verbose=False, bandwidth=0):
+        super().__init__(address, _StandInHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.bandwidth = bandwidth
+        self.corpus_dir = Path(corpus_dir) if corpus_dir else None
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/parse/image"
+
+    def text_for(self, filename, data):
+        if self.corpus_dir:
+            sidecar = self.corpus_dir / (Path(filename).name + '.txt')
+            if sidecar.exists():
+                return sidecar.read_text(encoding='utf-8')
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            return SAMPLE_TEXT
+
+    def start(self):
+        """Serve on a background thread (handy for tests and benchmarks)"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+
+def run_loadtest(url, files, requests_total=100, concurrency=8):
+    """OCR `requests_total` uploads through an OcrClient and return stats"""
+    from .metrics import LatencyRegistry
+
+    payloads = [(Path(f).name, Path(f).read_bytes()) for f in files] or [('sample.txt', SAMPLE_TEXT.encode())]
+    registry = LatencyRegistry(window=requests_total)
+    client = OcrClient(OcrSpaceBackend(url=url, pool_size=concurrency), max_concurrency=concurrency)
+
+    def one(i):
+        name, data = payloads[i % len(payloads)]
+        start = time.perf_counter()
+        client.backend.ocr_bytes(name, data)
+        registry.observe('ocr', time.perf_counter() - start)
+
+    errors = 0
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in as_completed([pool.submit(one, i) for i in range(requests_total)]):
+            if future.exception() is not None:
+                errors += 1
+    elapsed = time.perf_counter() - start
+    client.shutdown()
+
+    stats = registry.summary().get('ocr', {})
+    stats.update({'requests': requests_total, 'errors': errors, 'elapsed': elapsed,
+                  'throughput': requests_total / elapsed if elapsed else 0.0})
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local OCR stand-in server and load tester.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve = sub.add_parser('serve', help="run the stand-in OCR.space server")
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=8765)
+    serve.add_argument('--latency', type=float, default=0.0, help="simulated latency in ms")
+    serve.add_argument('--jitter', type=float, default=0.0, help="extra random latency in ms")
+    serve.add_argument('--bandwidth', type=float, default=0.0, help="simulated upload speed in KB/s")
+    serve.add_argument('--corpus', help="directory of <filename>.txt answers")
+    serve.add_argument('-v', '--verbose', action='store_true')
+
+    load = sub.add_parser('loadtest', help="measure OCR throughput and latency")
+    load.add_argument('files', nargs='*', help="images to upload (default: a text sample)")
+    load.add_argument('--url', default=os.environ.get(OCR_URL_ENV, 'http://127.0.0.1:8765/parse/image'))
+    load.add_argument('-n', '--requests', type=int, default=100)
+    load.add_argument('-c', '--concurrency', type=int, default=8)
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        server = StandInOcrServer((args.host, args.port), latency=args.latency / 1000,
+                                  jitter=args.jitter / 1000, corpus_dir=args.corpus,
+                                  verbose=args.verbose, bandwidth=args.bandwidth * 1024)
+        print(f"Stand-in OCR server on {server.url}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    stats = run_loadtest(args.url, args.files, args.requests, args.concurrency)
+    print(f"{stats['requests']} requests, {stats['errors']} errors in {stats['elapsed']:.2f}s "
+          f"- {stats['throughput']:.1f} req/s")
+    if 'p50' in stats:
+        print(f"latency p50 {stats['p50'] * 1000:.1f} ms, p95 {stats['p95'] * 1000:.1f} ms, "
+              f"p99 {stats['p99'] * 1000:.1f} ms")
+    return 1 if stats['errors'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,219 @@
+"""Vectorised BM25 / TF-IDF ranking of IPC sections.
+
+An alternative to the hand-tuned keyword rules in fir_core.matching. The
+titles and full descriptions of every section are compiled once into a
+sparse section x term matrix; a FIR, or a whole batch of FIRs, is then
+scored with a single sparse matrix product and the top-k rows are picked
+with argpartition instead of sorting every section.
+
+Explicit citations ("u/s 302", "420 IPC") and loose section numbers
+confirmed by a title keyword keep their rule-based points from
+score_section(); text relevance replaces the per-word and boost-term
+heuristics for everything else.
+
+    ranker = get_ranker(index)
+    ranker.rank(text)                 # same result shape as find_matching_sections
+    ranker.rank_batch(texts)          # one product for the whole batch
+
+Requires numpy and scipy.
+"""
+
+import re
+import threading
+
+import numpy as np
+from scipy import sparse
+
+from .index import IGNORE_WORDS
+from .matching import CITATION_PATTERN, IPC_SUFFIX_PATTERN, NUMBER_PATTERN, score_section
+from .sections import SectionMatch
+
+SCHEMES = ('bm25', 'tfidf')
+
+TOKEN_PATTERN = re.compile(r'[a-z]{3,}')
+
+# Boilerplate that appears in nearly every description and carries no signal
+STOP_WORDS = IGNORE_WORDS | {
+    'whoever', 'shall', 'with', 'which', 'may', 'extend', 'also', 'liable', 'fine', 'both',
+    'either', 'description', 'term', 'any', 'such', 'who', 'that', 'being', 'his', 'her',
+    'not', 'has', 'have', 'was', 'are', 'thereby', 'person', 'punished', 'imprisonment',
+}
+
+# Points per unit of relevance, so text matches land on the same scale as
+# the rule scores (5 points per keyword, 50 for an explicit citation)
+RELEVANCE_WEIGHT = {'bm25': 5.0, 'tfidf': 60.0}
+MIN_SCORE = 15
+
+
+def tokenize(text_lower):
+    return [t for t in TOKEN_PATTERN.findall(text_lower) if t not in STOP_WORDS]
+
+
+class SectionRanker:
+    """Sparse term matrix over one SectionIndex.
+
+    scheme='bm25' weights each (section, term) with BM25 saturation and length
+    normalisation and scores queries as binary term vectors; scheme='tfidf'
+    uses l2-normalised TF-IDF rows, so relevance is a cosine similarity.
+    Title terms count title_weight times.
+    """
+
+    def __init__(self, index, scheme='bm25', k1=1.2, b=0.75, title_weight=2.0, weight=None,
+                 min_score=MIN_SCORE):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown ranking scheme {scheme!r} (expected one of {', '.join(SCHEMES)})")
+        self.index = index
+        self.scheme = scheme
+        self.weight = RELEVANCE_WEIGHT[scheme] if weight is None else weight
+        self.min_score = min_score
+
+        vocabulary = {}
+        rows, cols, counts = [], [], []
+        for row_id, (title, description) in enumerate(zip(index.title_lowers, index.descriptions)):
+            tf = {}
+            for weight, field in ((title_weight, title), (1.0, str(description).lower())):
+                for token in tokenize(field):
+                    tf[token] = tf.get(token, 0.0) + weight
+            for token, count in tf.items():
+                rows.append(row_id)
+                cols.append(vocabulary.setdefault(token, len(vocabulary)))
+                counts.append(count)
+        self.vocabulary = vocabulary
+
+        n_rows, n_terms = len(index), len(vocabulary)
+        tf = sparse.csr_matrix((np.asarray(counts, dtype=np.float64), (rows, cols)),
+                               shape=(n_rows, n_terms))
+        df = np.bincount(np.asarray(cols, dtype=np.int64), minlength=n_terms)
+
+        if scheme == 'bm25':
+            self.idf = np.log1p((n_rows - df + 0.5) / (df + 0.5))
+            lengths = np.asarray(tf.sum(axis=1)).ravel()
+            avg_length = lengths.mean() if n_rows else 0.0
+            norm = k1 * (1 - b + b * lengths / (avg_length or 1.0))
+            # tf * (k1 + 1) / (tf + norm), applied to the stored entries only
+            row_norm = np.repeat(norm, np.diff(tf.indptr))
+            data = tf.data * (k1 + 1) / (tf.data + row_norm)
+            weights = sparse.csr_matrix((data, tf.indices, tf.indptr), shape=tf.shape)
+            weights = weights @ sparse.diags(self.idf)
+        else:
+            self.idf = np.log((1 + n_rows) / (1 + df)) + 1
+            weights = _l2_normalize(tf @ sparse.diags(self.idf))
+
+        # Stored transposed (term x section): queries @ matrix gives FIRs x sections
+        self.matrix = sparse.csr_matrix(weights.T)
+
+    def vectorize(self, texts):
+        """Sparse FIRs x terms query matrix"""
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            tf = {}
+            for token in tokenize(text.lower()):
+                col = self.vocabulary.get(token)
+                if col is not None:
+                    tf[col] = tf.get(col, 0) + 1
+            indices.extend(tf)
+            # BM25 scores a term once however often the FIR repeats it
+            data.extend(tf.values() if self.scheme == 'tfidf' else [1.0] * len(tf))
+            indptr.append(len(indices))
+        queries = sparse.csr_matrix((np.asarray(data, dtype=np.float64), indices, indptr),
+                                    shape=(len(indptr) - 1, len(self.vocabulary)))
+        if self.scheme == 'tfidf':
+            queries = _l2_normalize(queries @ sparse.diags(self.idf))
+        return queries
+
+    def relevance(self, texts):
+        """Sparse FIRs x sections relevance, from one matrix product"""
+        return (self.vectorize(texts) @ self.matrix).tocsr()
+
+    def rank(self, text, limit=8):
+        return self.rank_batch([text], limit)[0]
+
+    def rank_batch(self, texts, limit=8):
+        """Return a find_matching_sections-style list for every text"""
+        texts = [text or "" for text in texts]
+        if not texts or not len(self.index):
+            return [[] for _ in texts]
+        relevance = self.relevance(texts)
+        n_rows = len(self.index)
+        out = []
+        for i, text in enumerate(texts):
+            scores = np.zeros(n_rows)
+            start, end = relevance.indptr[i], relevance.indptr[i + 1]
+            scores[relevance.indices[start:end]] = relevance.data[start:end] * self.weight
+            match_types = self._apply_rules(text.lower(), scores)
+            out.append(self._top(scores, match_types, limit))
+        return out
+
+    def _apply_rules(self, text_lower, scores):
+        """Add citation / number+keyword points in place; returns {row: match_type}"""
+        explicit = set(CITATION_PATTERN.findall(text_lower))
+        explicit.update(IPC_SUFFIX_PATTERN.findall(text_lower))
+        numbers = set(NUMBER_PATTERN.findall(text_lower))
+        rows = {row for number in explicit | numbers for row in self.index.by_number.get(number, ())}
+        if not rows:
+            return {}
+        # Only these rows' title words matter; substring checks on a handful of
+        # words beat a full automaton pass over the FIR
+        found_words = {word for row_id in rows for word in self.index.number_words[row_id]
+                       if word in text_lower}
+        match_types = {}
+        for row_id in rows:
+            points, match_type = score_section(self.index, row_id, explicit, numbers, found_words)
+            scores[row_id] += points
+            if match_type:
+                match_types[row_id] = match_type
+        return match_types
+
+    def _top(self, scores, match_types, limit):
+        eligible = np.flatnonzero(scores >= self.min_score)
+        k = limit
+        while True:
+            if len(eligible) > k:
+                top = eligible[np.argpartition(-scores[eligible], k - 1)[:k]]
+            else:
+                top = eligible
+            # Highest score first; ties keep dataset order
+            top = top[np.lexsort((top, -scores[top]))]
+            results = self._dedupe(top, scores, match_types, limit)
+            # Duplicate section numbers can leave us short; widen and retry
+            if len(results) >= limit or len(top) == len(eligible):
+                return results
+            k *= 2
+
+    def _dedupe(self, rows, scores, match_types, limit):
+        records = self.index.records
+        results = []
+        seen_sections = set()
+        for row_id in rows.tolist():
+            record = records[row_id]
+            if record.section in seen_sections:
+                continue
+            seen_sections.add(record.section)
+            results.append(SectionMatch(record, round(float(scores[row_id]), 1),
+                                        match_types.get(row_id, "")))
+            if len(results) >= limit:
+                break
+        return results
+
+
+def _l2_normalize(matrix):
+    matrix = sparse.csr_matrix(matrix)
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1.0
+    return sparse.diags(1.0 / norms) @ matrix
+
+
+_rankers = {}
+_rankers_lock = threading.Lock()
+
+
+def get_ranker(index, scheme='bm25'):
+    """One ranker per (dataset, scheme) for the whole process"""
+    key = (index.fingerprint, scheme)
+    ranker = _rankers.get(key)
+    if ranker is None:
+        with _rankers_lock:
+            ranker = _rankers.get(key)
+            if ranker is None:
+                ranker = _rankers[key] = SectionRanker(index, scheme)
+    return ranker
@@ -0,0 +1,91 @@
+"""Shared, read-only section records and the match results that point at them.
+
+Every SectionIndex owns one SectionRecord per dataset row, created once and
+shared by every session and thread in the process. Match results
+(SectionMatch) hold a reference to their record plus a score instead of
+copies of the title and description, so the memory a result costs no longer
+depends on how long the statute text is.
+
+SectionMatch behaves like the dicts results used to be (match['title'],
+dict(match), ==); pickling turns it into a plain dict so process pools and
+the disk cache never drag the shared tables along.
+"""
+
+import sys
+from collections.abc import Mapping
+
+
+def intern_str(value):
+    return sys.intern(value) if type(value) is str else value
+
+
+class SectionRecord:
+    """One IPC section: number, title and (lazily read) description"""
+
+    __slots__ = ('row_id', 'section', 'title', '_source')
+
+    def __init__(self, row_id, section, title, source):
+        self.row_id = row_id
+        self.section = section
+        self.title = title
+        # The index's description column (a list or a shared mmap), or the
+        # text itself for a record that was pickled on its own
+        self._source = source
+
+    @property
+    def description(self):
+        source = self._source
+        return source if isinstance(source, str) else source[self.row_id]
+
+    # The dataset has no separate punishment column; results always reused the description
+    punishment = description
+
+    def __reduce__(self):
+        return SectionRecord, (self.row_id, self.section, self.title, self.description)
+
+    def __repr__(self):
+        return f"SectionRecord({self.section!r}, {self.title!r})"
+
+
+class SectionMatch(Mapping):
+    """A section matched against one FIR: a record reference plus its score"""
+
+    __slots__ = ('record', 'score', 'match_type')
+
+    KEYS = ('section', 'title', 'description', 'punishment', 'score', 'match_type')
+
+    def __init__(self, record, score, match_type=""):
+        self.record = record
+        self.score = score
+        self.match_type = match_type
+
+    def __getitem__(self, key):
+        if key == 'score':
+            return self.score
+        if key == 'match_type':
+            return self.match_type
+        if key in self.KEYS:
+            return getattr(self.record, key)
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def to_dict(self):
+        return {key: self[key] for key in self.KEYS}
+
+    def __reduce__(self):
+        return dict, (self.to_dict(),)
+
+    def __repr__(self):
+        return f"SectionMatch({self.record.section!r}, score={self.score!r}, match_type={self.match_type!r})"
+
+
+def json_default(value):
+    """json.dumps(default=...) hook: results serialise as plain objects"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
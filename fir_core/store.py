@@ -0,0 +1,408 @@
+"""Persistent FIR store on SQLite (WAL mode).
+
+Submitted and batch-analysed FIRs are written with their matched sections
+to an embedded database, indexed by section, severity, priority, date and
+location. Weekly counts per section, severity and priority are kept in a
+small aggregate table that every insert updates in the same transaction,
+so the dashboard reads a few hundred aggregate rows instead of scanning
+millions of FIRs.
+
+FIRs stored with a MinHash signature (fir_core.dedup) are also filed under
+their LSH band buckets, so find_duplicates() checks a new FIR against the
+whole store with a few index lookups. FIRs saved as duplicates of an earlier
+one are kept but left out of the aggregates, so repeat reports of one
+incident don't inflate the statistics.
+
+    store = get_store()                      # $FIR_STORE_PATH or ./fir_store.db
+    store.add(results, form_data, text)
+    store.add_many(records)                  # bulk ingest, one transaction per chunk
+    store.top_sections(weeks=12)
+    store.weekly_trend('severity', weeks=12)
+    store.find_duplicates(minhash(text))     # [(fir_id, similarity)]
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+STORE_PATH_ENV = 'FIR_STORE_PATH'
+DEFAULT_STORE_PATH = 'fir_store.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS firs (
+    id            INTEGER PRIMARY KEY,
+    source        TEXT NOT NULL,
+    external_id   TEXT,
+    created_at    REAL NOT NULL,
+    incident_date TEXT NOT NULL,
+    week          TEXT NOT NULL,
+    location      TEXT,
+    complainant   TEXT,
+    accused       TEXT,
+    severity      TEXT,
+    priority      TEXT,
+    crime_types   TEXT,
+    narrative     TEXT
+);
+CREATE INDEX IF NOT EXISTS firs_date ON firs (incident_date);
+CREATE INDEX IF NOT EXISTS firs_severity ON firs (severity, incident_date);
+CREATE INDEX IF NOT EXISTS firs_priority ON firs (priority, incident_date);
+CREATE INDEX IF NOT EXISTS firs_location ON firs (location COLLATE NOCASE, incident_date);
+
+CREATE TABLE IF NOT EXISTS fir_sections (
+    fir_id     INTEGER NOT NULL REFERENCES firs (id),
+    section    TEXT NOT NULL,
+    score      REAL,
+    match_type TEXT,
+    PRIMARY KEY (fir_id, section)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS fir_sections_section ON fir_sections (section, fir_id);
+
+CREATE TABLE IF NOT EXISTS weekly_counts (
+    dimension TEXT NOT NULL,
+    value     TEXT NOT NULL,
+    week      TEXT NOT NULL,
+    count     INTEGER NOT NULL,
+    PRIMARY KEY (dimension, week, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fir_signatures (
+    fir_id       INTEGER PRIMARY KEY REFERENCES firs (id),
+    signature    BLOB NOT NULL,
+    duplicate_of INTEGER,
+    similarity   REAL
+);
+
+CREATE TABLE IF NOT EXISTS fir_lsh (
+    band   INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    fir_id INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, fir_id)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_COUNT = """
+INSERT INTO weekly_counts (dimension, value, week, count) VALUES (?, ?, ?, ?)
+ON CONFLICT (dimension, week, value) DO UPDATE SET count = count + excluded.count
+"""
+
+
+def week_of(day):
+    """ISO week label, e.g. '2024-W07', for a date or 'YYYY-MM-DD' string"""
+    if isinstance(day, str):
+        day = date.fromisoformat(day[:10])
+    year, week, _ = day.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _incident_date(form_data, now):
+    value = (form_data or {}).get('incidentDate')
+    if value:
+        try:
+            return date.fromisoformat(str(value)[:10]).isoformat()
+        except ValueError:
+            pass
+    # No usable incident date: file it under the day it was recorded
+    return datetime.fromtimestamp(now).date().isoformat()
+
+
+class FirStore:
+    """Thread-safe handle on one store file.
+
+    Each thread gets its own connection; WAL lets the dashboard read while a
+    batch job is writing.
+    """
+
+    def __init__(self, path, timeout=30.0, chunk_size=1000):
+        self.path = path
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def _transaction(self):
+        return _Transaction(self._connect())
+
+    # --- writes ---
+
+    def add(self, results, form_data=None, text=None, source='form', external_id=None,
+            signature=None, duplicate_of=None, similarity=None):
+        """Store one analysed FIR; returns its id"""
+        return self.add_many([{'results': results, 'form_data': form_data, 'text': text,
+                               'source': source, 'id': external_id, 'signature': signature,
+                               'duplicate_of': duplicate_of, 'similarity': similarity}])[0]
+
+    def add_many(self, records, dedup=False):
+        """Bulk insert; each record is a dict with 'results' and optionally
+        'form_data', 'text', 'source', 'id', 'signature' (a MinHash from
+        fir_core.dedup) and 'duplicate_of'/'similarity'. Returns the new row ids.
+
+        With dedup=True every record with a signature and no duplicate_of is
+        first checked against the store and the records before it, and
+        flagged if it matches. Rows, section links and aggregate deltas for a
+        chunk are written in one transaction, so aggregates never disagree
+        with the rows.
+        """
+        ids = []
+        chunk = []
+        for record in records:
+            chunk.append(record)
+            if len(chunk) >= self.chunk_size:
+                ids.extend(self._insert_chunk(chunk, dedup))
+                chunk = []
+        if chunk:
+            ids.extend(self._insert_chunk(chunk, dedup))
+        return ids
+
+    def _insert_chunk(self, records, dedup=False):
+        now = time.time()
+        fir_rows, section_rows, signature_rows, lsh_rows = [], [], [], []
+        deltas = Counter()
+        if dedup:
+            from .dedup import LshIndex
+            # Records of this chunk aren't in the tables until the end
+            chunk_index = LshIndex()
+        with self._transaction() as conn:
+            # BEGIN IMMEDIATE holds the write lock, so ids can be assigned up front
+            next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM firs").fetchone()[0]
+            for offset, record in enumerate(records):
+                fir_id = next_id + offset
+                results = record['results']
+                signature = record.get('signature')
+                duplicate_of = record.get('duplicate_of')
+                similarity = record.get('similarity')
+                if dedup and signature is not None:
+                    if duplicate_of is None:
+                        matches = self.find_duplicates(signature, limit=1) + chunk_index.query(signature, limit=1)
+                        if matches:
+                            duplicate_of, similarity = max(matches, key=lambda m: (m[1], -m[0]))
+                    if duplicate_of is None:
+                        chunk_index.add(fir_id, signature)
+                form_data = record.get('form_data') or {}
+                incident_date = _incident_date(form_data, now)
+                week = week_of(incident_date)
+                external_id = record.get('id')
+                fir_rows.append((
+                    fir_id, record.get('source') or 'form',
+                    None if external_id is None else str(external_id),
+                    now, incident_date, week,
+                    form_data.get('incidentLocation') or None,
+                    form_data.get('complainantName') or None,
+                    form_data.get('accusedName') or None,
+                    results.get('severity'), results.get('priority'),
+                    json.dumps(results.get('crimeTypes') or []),
+                    record.get('text'),
+                ))
+
+                if signature is not None:
+                    signature_rows.append((fir_id, _signature_bytes(signature), duplicate_of, similarity))
+                    lsh_rows.extend(_lsh_rows(fir_id, signature))
+
+                if duplicate_of is not None:
+                    deltas['duplicate', 'flagged', week] += 1
+                else:
+                    deltas['severity', results.get('severity') or 'Unknown', week] += 1
+                    deltas['priority', results.get('priority') or 'Normal', week] += 1
+                seen = set()
+                for match in results.get('ipcSections') or ():
+                    section = str(match['section'])
+                    if section in seen:
+                        continue
+                    seen.add(section)
+                    section_rows.append((fir_id, section, match['score'], match['match_type']))
+                    if duplicate_of is None:
+                        deltas['section', section, week] += 1
+
+            conn.executemany("INSERT INTO firs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", fir_rows)
+            conn.executemany("INSERT INTO fir_sections VALUES (?, ?, ?, ?)", section_rows)
+            conn.executemany("INSERT INTO fir_signatures VALUES (?, ?, ?, ?)", signature_rows)
+            conn.executemany("INSERT INTO fir_lsh VALUES (?, ?, ?)", lsh_rows)
+            conn.executemany(_UPSERT_COUNT, [(dim, value, week, n) for (dim, value, week), n in deltas.items()])
+        return [row[0] for row in fir_rows]
+
+    def rebuild_aggregates(self):
+        """Recompute weekly_counts from the rows (repair only: full scan)"""
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM weekly_counts")
+            duplicates = "SELECT fir_id FROM fir_signatures WHERE duplicate_of IS NOT NULL"
+            for dimension, default in (('severity', 'Unknown'), ('priority', 'Normal')):
+                conn.execute(f"""
+                    INSERT INTO weekly_counts
+                    SELECT '{dimension}', COALESCE({dimension}, '{default}'), week, COUNT(*)
+                    FROM firs WHERE id NOT IN ({duplicates}) GROUP BY 2, week
+                """)
+            conn.execute(f"""
+                INSERT INTO weekly_counts
+                SELECT 'section', s.section, f.week, COUNT(*)
+                FROM fir_sections s JOIN firs f ON f.id = s.fir_id
+                WHERE f.id NOT IN ({duplicates}) GROUP BY s.section, f.week
+            """)
+            conn.execute(f"""
+                INSERT INTO weekly_counts
+                SELECT 'duplicate', 'flagged', week, COUNT(*)
+                FROM firs WHERE id IN ({duplicates}) GROUP BY week
+            """)
+
+    # --- reads ---
+
+    def count(self):
+        # MAX(id) is an index lookup; rows are never deleted
+        return self._connect().execute("SELECT COALESCE(MAX(id), 0) FROM firs").fetchone()[0]
+
+    def totals(self, dimension, weeks=None):
+        """{value: count} for a dimension, over the last `weeks` weeks or all time"""
+        sql = "SELECT value, SUM(count) FROM weekly_counts WHERE dimension = ?"
+        params = [dimension]
+        if weeks:
+            sql += " AND week >= ?"
+            params.append(_first_week(weeks))
+        rows = self._connect().execute(sql + " GROUP BY value ORDER BY 2 DESC", params)
+        return dict(rows.fetchall())
+
+    def top_sections(self, weeks=None, limit=20):
+        """[(section, count)] for the most frequently matched sections"""
+        return list(self.totals('section', weeks).items())[:limit]
+
+    def weekly_trend(self, dimension='severity', weeks=12, value=None):
+        """[(week, value, count)] oldest first, e.g. severity per week"""
+        sql = "SELECT week, value, count FROM weekly_counts WHERE dimension = ? AND week >= ?"
+        params = [dimension, _first_week(weeks)]
+        if value is not None:
+            sql += " AND value = ?"
+            params.append(str(value))
+        return self._connect().execute(sql + " ORDER BY week, value", params).fetchall()
+
+    def find_duplicates(self, signature, threshold=None, limit=5):
+        """[(fir_id, similarity)] of stored FIRs at least `threshold` similar
+        to a MinHash signature, most similar first"""
+        from .dedup import DEFAULT_THRESHOLD, band_hashes, is_blank, similarity
+
+        if is_blank(signature):
+            return []
+        threshold = DEFAULT_THRESHOLD if threshold is None else threshold
+        buckets = list(enumerate(band_hashes(signature)))
+        # One primary-key probe per band
+        probes = " UNION ".join(["SELECT fir_id FROM fir_lsh WHERE band = ? AND bucket = ?"] * len(buckets))
+        candidates = self._connect().execute(
+            f"SELECT fir_id, signature FROM fir_signatures WHERE fir_id IN ({probes})",
+            [value for pair in buckets for value in pair]).fetchall()
+        matches = []
+        for fir_id, stored in candidates:
+            score = similarity(signature, _signature_array(stored))
+            if score >= threshold:
+                matches.append((fir_id, score))
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches[:limit]
+
+    def find(self, section=None, severity=None, priority=None, location=None,
+             date_from=None, date_to=None, limit=100):
+        """Most recent FIRs matching every given filter, as dicts"""
+        clauses, params = [], []
+        if section:
+            clauses.append("id IN (SELECT fir_id FROM fir_sections WHERE section = ?)")
+            params.append(str(section))
+        for column, value in (('severity', severity), ('priority', priority)):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if location:
+            clauses.append("location = ? COLLATE NOCASE")
+            params.append(location)
+        if date_from:
+            clauses.append("incident_date >= ?")
+            params.append(str(date_from))
+        if date_to:
+            clauses.append("incident_date <= ?")
+            params.append(str(date_to))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        conn = self._connect()
+        cursor = conn.execute(
+            f"SELECT id, source, external_id, incident_date, location, severity, priority, crime_types, "
+            f"(SELECT duplicate_of FROM fir_signatures WHERE fir_id = id) AS duplicate_of "
+            f"FROM firs {where} ORDER BY id DESC LIMIT ?", params + [limit])
+        columns = [c[0] for c in cursor.description]
+        rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        if rows:
+            placeholders = ",".join("?" * len(rows))
+            sections = {}
+            for fir_id, sec in conn.execute(
+                    f"SELECT fir_id, section FROM fir_sections WHERE fir_id IN ({placeholders})",
+                    [row['id'] for row in rows]):
+                sections.setdefault(fir_id, []).append(sec)
+            for row in rows:
+                row['crime_types'] = json.loads(row['crime_types'] or '[]')
+                row['sections'] = sections.get(row['id'], [])
+        return rows
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Transaction:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __enter__(self):
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def _lsh_rows(fir_id, signature):
+    from .dedup import band_hashes
+    return [(band, bucket, fir_id) for band, bucket in enumerate(band_hashes(signature))]
+
+
+def _signature_bytes(signature):
+    import numpy as np
+    return np.ascontiguousarray(signature, dtype=np.uint32).tobytes()
+
+
+def _signature_array(raw):
+    import numpy as np
+    return np.frombuffer(raw, dtype=np.uint32)
+
+
+def _first_week(weeks):
+    return week_of(date.today() - timedelta(weeks=weeks - 1))
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def store_path(path=None):
+    """Explicit path, else $FIR_STORE_PATH, else ./fir_store.db"""
+    return path or os.environ.get(STORE_PATH_ENV) or DEFAULT_STORE_PATH
+
+
+def get_store(path=None):
+    """One FirStore per file for the whole process"""
+    path = store_path(path)
+    store = _stores.get(path)
+    if store is None:
+        with _stores_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = _stores[path] = FirStore(path)
+    return store
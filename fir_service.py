@@ -0,0 +1,522 @@
+"""Headless HTTP service for FIR analysis.
+
+Other systems call the classifier over plain JSON:
+
+    POST /analyze         {"text": "...", "form_data": {...}}
+    POST /analyze/batch   {"firs": [{"id": 1, "text": "...", "form_data": {...}}, ...]}
+                          (a FIR that fails comes back as {"id": 1, "error": "..."})
+    GET  /healthz         readiness, queue depth and worker count
+    GET  /metrics         Prometheus text format
+
+Requests are queued and a dispatcher thread groups whatever arrives within a
+short window (or up to --max-batch FIRs) into one task for a process pool
+whose workers load the IPC section index once. Admission is bounded: once
+--max-queue FIRs are waiting or running, new work is answered with 429 and a Retry-After header instead of
+piling up, and 503 is returned while the pool is starting or being rebuilt
+after a worker died, or when a request waited longer than --timeout. A request that times out is withdrawn:
+its FIRs that have not reached a worker are dropped from the queue.
+
+Usage:
+    python fir_service.py --port 8080 --workers 4
+    python benchmarks/load_service.py --url http://127.0.0.1:8080 -n 2000 -c 32
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fir_core import analyze_fir_logic, get_section_index
+from fir_core.metrics import REGISTRY
+from fir_core.sections import json_default
+
+MAX_BODY_BYTES = 8 * 1024 * 1024
+MAX_BATCH_FIRS = 256
+
+# Seconds between attempts to rebuild a broken worker pool
+RESTART_DELAY = 1.0
+
+# Per-worker state, filled in by _init_worker
+_worker = {}
+
+
+class ServiceOverloaded(Exception):
+    """Too many FIRs admitted; the caller should retry later (HTTP 429)"""
+
+
+class ServiceUnavailable(Exception):
+    """The worker pool is starting, shutting down or broken (HTTP 503)"""
+
+
+# -----------------------------------------------------------------------------
+# WORKERS
+# -----------------------------------------------------------------------------
+
+def _init_worker(dataset_path):
+    _worker['index'] = get_section_index(dataset_path)
+
+
+def _ping():
+    return len(_worker['index'].sections)
+
+
+def _analyze_batch(items):
+    out = []
+    for text, form_data in items:
+        try:
+            out.append(analyze_fir_logic(text, form_data, index=_worker['index']))
+        except Exception as e:
+            out.append({'error': f"{type(e).__name__}: {e}"})
+    return out
+
+
+# -----------------------------------------------------------------------------
+# BATCHING
+# -----------------------------------------------------------------------------
+
+class AnalysisService:
+    """Micro-batching front end for a process pool.
+
+    submit() admits FIRs into a queue and returns one Future per FIR; at most
+    max_queue FIRs are admitted at a time, counting those already running.
+    A dispatcher thread waits up to batch_window seconds for more work, sends
+    at most max_batch FIRs per pool task and keeps at most max_in_flight
+    batches running, so a slow pool makes the queue fill up and submit()
+    start raising ServiceOverloaded.
+    """
+
+    def __init__(self, dataset_path=None, workers=None, max_batch=32, batch_window=0.005,
+                 max_queue=512, max_in_flight=None, registry=REGISTRY):
+        self.dataset_path = dataset_path
+        self.workers = workers or os.cpu_count() or 1
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self.max_queue = max_queue
+        self.max_in_flight = max_in_flight or self.workers * 2
+        self.registry = registry
+
+        self.ready = False
+        self.error = None
+        self.batches = 0
+        self.batched_firs = 0
+        self.rejected = 0
+        self.restarts = 0
+
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._slots = threading.BoundedSemaphore(self.max_in_flight)
+        self._in_flight = 0
+        self._in_flight_firs = 0
+        self._closing = False
+        self._pool = None
+        self._restarting = False
+        self._dispatcher = None
+
+    def _new_pool(self):
+        """A process pool whose workers have all loaded the index"""
+        pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                   initargs=(self.dataset_path,))
+        try:
+            for future in [pool.submit(_ping) for _ in range(self.workers)]:
+                future.result()
+        except Exception:
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        return pool
+
+    def start(self):
+        """Start the pool and dispatcher; returns once every worker has the index"""
+        try:
+            self._pool = self._new_pool()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            raise ServiceUnavailable(self.error) from e
+        self._dispatcher = threading.Thread(target=self._dispatch, name='fir-dispatch', daemon=True)
+        self._dispatcher.start()
+        self.ready = True
+        return self
+
+    def queue_depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def submit(self, items):
+        """items: list of (text, form_data). Returns a Future per item.
+
+        All-or-nothing: if the whole request does not fit in the queue none
+        of it is admitted.
+        """
+        now = time.perf_counter()
+        with self._cond:
+            if not self.ready or self._closing:
+                raise ServiceUnavailable(self.error or "service is not accepting work")
+            # FIRs already on a worker count too, or the real bound would be
+            # max_queue plus max_in_flight * max_batch
+            admitted = len(self._queue) + self._in_flight_firs
+            if admitted + len(items) > self.max_queue:
+                self.rejected += len(items)
+                raise ServiceOverloaded(f"service full ({len(self._queue)} queued, {self._in_flight_firs} "
+                                        f"running, at most {self.max_queue})")
+            futures = []
+            for text, form_data in items:
+                future = Future()
+                self._queue.append((text, form_data, future, now))
+                futures.append(future)
+            self._cond.notify()
+        return futures
+
+    def cancel(self, futures):
+        """Withdraw a request's FIRs that no worker has started yet"""
+        with self._cond:
+            if any([future.cancel() for future in futures]):
+                self._queue = deque(entry for entry in self._queue if not entry[2].cancelled())
+
+    def _dispatch(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closing:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                # Give concurrent requests a moment to join this batch
+                deadline = time.perf_counter() + self.batch_window
+                while len(self._queue) < self.max_batch and not self._closing:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            # Block here, not in the handlers: while every slot is busy the
+            # queue grows until submit() starts rejecting
+            self._slots.acquire()
+            with self._cond:
+                batch = [self._queue.popleft() for _ in range(min(self.max_batch, len(self._queue)))]
+                # Marks the futures running, so a late cancel() can no longer succeed
+                batch = [entry for entry in batch if entry[2].set_running_or_notify_cancel()]
+                self._in_flight += 1
+                self._in_flight_firs += len(batch)
+            if not batch:
+                self._release(batch)
+                continue
+
+            started = time.perf_counter()
+            for _, _, _, enqueued in batch:
+                self.registry.observe('service_queue_wait', started - enqueued)
+            pool = self._pool
+            try:
+                task = pool.submit(_analyze_batch, [(text, form) for text, form, _, _ in batch])
+            except Exception as e:
+                self._fail(batch, e, pool)
+                self._release(batch)
+                continue
+            task.add_done_callback(lambda f, b=batch, s=started, p=pool: self._finish(f, b, s, p))
+
+    def _finish(self, task, batch, started, pool):
+        try:
+            results = task.result()
+        except Exception as e:
+            self._fail(batch, e, pool)
+        else:
+            self.registry.observe('service_batch', time.perf_counter() - started)
+            with self._cond:
+                self.batches += 1
+                self.batched_firs += len(batch)
+            for (_, _, future, _), result in zip(batch, results):
+                if not future.cancelled():
+                    future.set_result(result)
+        finally:
+            self._release(batch)
+
+    def _fail(self, batch, exc, pool):
+        error = f"{type(exc).__name__}: {exc}"
+        if isinstance(exc, BrokenExecutor):
+            # A crashed worker (an OOM kill, say) breaks the whole pool:
+            # answer 503 while a fresh one starts
+            self._restart(error, pool)
+        for _, _, future, _ in batch:
+            if not future.cancelled():
+                future.set_exception(ServiceUnavailable(error))
+
+    def _restart(self, error, broken):
+        with self._cond:
+            # Late failures from a pool already replaced change nothing
+            if broken is not self._pool or self._restarting or self._closing:
+                return
+            self.error = error
+            self.ready = False
+            self._restarting = True
+        threading.Thread(target=self._rebuild_pool, args=(broken,), name='fir-restart', daemon=True).start()
+
+    def _rebuild_pool(self, broken):
+        broken.shutdown(wait=False, cancel_futures=True)
+        while True:
+            try:
+                pool = self._new_pool()
+            except Exception as e:
+                with self._cond:
+                    self.error = f"{type(e).__name__}: {e}"
+                    if self._closing:
+                        self._restarting = False
+                        return
+                time.sleep(RESTART_DELAY)
+                continue
+            with self._cond:
+                self._restarting = False
+                if self._closing:
+                    break
+                self._pool = pool
+                self.restarts += 1
+                self.error = None
+                self.ready = True
+                return
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _release(self, batch):
+        with self._cond:
+            self._in_flight -= 1
+            self._in_flight_firs -= len(batch)
+        self._slots.release()
+
+    def stats(self):
+        with self._cond:
+            return {
+                'ready': self.ready,
+                'workers': self.workers,
+                'queue_depth': len(self._queue),
+                'max_queue': self.max_queue,
+                'in_flight_batches': self._in_flight,
+                'in_flight_firs': self._in_flight_firs,
+                'batches': self.batches,
+                'batched_firs': self.batched_firs,
+                'rejected_firs': self.rejected,
+                'pool_restarts': self.restarts,
+                'error': self.error,
+            }
+
+    def close(self):
+        with self._cond:
+            self._closing = True
+            self.ready = False
+            self._cond.notify_all()
+        if self._dispatcher is not None:
+            self._dispatcher.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+
+
+# -----------------------------------------------------------------------------
+# HTTP
+# -----------------------------------------------------------------------------
+
+class _BadRequest(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        if self.path == '/healthz':
+            stats = server.service.stats()
+            self._send_json(200 if stats['ready'] else 503, stats)
+        elif self.path == '/metrics':
+            self._send(200, server.prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        else:
+            self._send_json(404, {'error': f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        start = time.perf_counter()
+        self._body_read = False
+        try:
+            if self.path == '/analyze':
+                body = self._read_json()
+                items = [_parse_fir(body)]
+            elif self.path == '/analyze/batch':
+                body = self._read_json()
+                firs = body.get('firs') if isinstance(body, dict) else None
+                if not isinstance(firs, list) or not firs:
+                    raise _BadRequest(400, "Expected {\"firs\": [...]} with at least one FIR")
+                if len(firs) > MAX_BATCH_FIRS:
+                    raise _BadRequest(413, f"At most {MAX_BATCH_FIRS} FIRs per request")
+                items = [_parse_fir(fir) for fir in firs]
+            else:
+                raise _BadRequest(404, f"Unknown path {self.path}")
+
+            futures = self.server.service.submit(items)
+            deadline = start + self.server.request_timeout
+            try:
+                results = [f.result(timeout=max(0.0, deadline - time.perf_counter())) for f in futures]
+            except FutureTimeout:
+                # Nobody will read these results: don't spend a worker on them
+                self.server.service.cancel(futures)
+                raise
+        except _BadRequest as e:
+            # An unread body would be parsed as the next request on this
+            # connection; send_header closes it after the reply
+            headers = None if self._body_read else {'Connection': 'close'}
+            return self._send_json(e.status, {'error': str(e)}, headers)
+        except ServiceOverloaded as e:
+            return self._send_json(429, {'error': str(e)}, {'Retry-After': '1'})
+        except ServiceUnavailable as e:
+            return self._send_json(503, {'error': str(e)}, {'Retry-After': '5'})
+        except FutureTimeout:
+            return self._send_json(503, {'error': "Timed out waiting for a worker"}, {'Retry-After': '1'})
+        except Exception as e:
+            return self._send_json(500, {'error': f"{type(e).__name__}: {e}"})
+
+        self.server.service.registry.observe('service_request', time.perf_counter() - start)
+        # Workers report a failed analysis as an {'error': ...} result. In a
+        # batch that is one item's outcome; the other results still stand
+        if self.path == '/analyze':
+            self._send_json(500 if 'error' in results[0] else 200, results[0])
+        else:
+            ids = [fir.get('id', i) for i, fir in enumerate(body['firs'])]
+            self._send_json(200, {'results': [dict(result, id=fir_id) for fir_id, result in zip(ids, results)]})
+
+    def _read_json(self):
+        header = self.headers.get('Content-Length')
+        if header is None:
+            raise _BadRequest(411, "Content-Length required")
+        try:
+            length = int(header)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise _BadRequest(400, f"Invalid Content-Length: {header!r}")
+        if length > MAX_BODY_BYTES:
+            raise _BadRequest(413, f"Body larger than {MAX_BODY_BYTES} bytes")
+        data = self.rfile.read(length)
+        self._body_read = True
+        try:
+            return json.loads(data or b'null')
+        except ValueError as e:
+            raise _BadRequest(400, f"Invalid JSON: {e}")
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload, default=json_default).encode('utf-8'), 'application/json', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.server.count_response(status)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def _parse_fir(fir):
+    if not isinstance(fir, dict) or not isinstance(fir.get('text'), str):
+        raise _BadRequest(400, "Each FIR needs a \"text\" string")
+    form_data = fir.get('form_data')
+    if form_data is not None and not isinstance(form_data, dict):
+        raise _BadRequest(400, "\"form_data\" must be an object")
+    return fir['text'], form_data
+
+
+class AnalysisServer(ThreadingHTTPServer):
+    """HTTP front end for an AnalysisService"""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, service, request_timeout=30.0, verbose=False):
+        super().__init__(address, _Handler)
+        self.service = service
+        self.request_timeout = request_timeout
+        self.verbose = verbose
+        self.responses = Counter()
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count_response(self, status):
+        with self._lock:
+            self.responses[status] += 1
+
+    def prometheus(self):
+        stats = self.service.stats()
+        with self._lock:
+            responses = sorted(self.responses.items())
+        lines = [
+            "# HELP fir_service_responses_total HTTP responses by status code.",
+            "# TYPE fir_service_responses_total counter",
+        ]
+        lines += [f'fir_service_responses_total{{code="{code}"}} {n}' for code, n in responses]
+        for name, kind, key, help_text in (
+            ('queue_depth', 'gauge', 'queue_depth', "FIRs waiting for a worker."),
+            ('in_flight_batches', 'gauge', 'in_flight_batches', "Batches running on the pool."),
+            ('in_flight_firs', 'gauge', 'in_flight_firs', "FIRs running on the pool."),
+            ('batches_total', 'counter', 'batches', "Batches completed."),
+            ('batched_firs_total', 'counter', 'batched_firs', "FIRs analyzed in batches."),
+            ('rejected_firs_total', 'counter', 'rejected_firs', "FIRs rejected because the queue was full."),
+            ('pool_restarts_total', 'counter', 'pool_restarts', "Worker pools rebuilt after a worker died."),
+        ):
+            lines += [f"# HELP fir_service_{name} {help_text}", f"# TYPE fir_service_{name} {kind}",
+                      f"fir_service_{name} {stats[key]}"]
+        lines += ["# TYPE fir_service_ready gauge", f"fir_service_ready {int(stats['ready'])}"]
+        return "\n".join(lines) + "\n" + self.service.registry.to_prometheus()
+
+
+# -----------------------------------------------------------------------------
+# CLI
+# -----------------------------------------------------------------------------
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="HTTP service for FIR analysis.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--dataset', help="path to the IPC dataset CSV (default: $FIR_IPC_DATASET or the app's dataset)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument('--max-batch', type=int, default=32, help="FIRs sent to a worker per task")
+    parser.add_argument('--batch-window', type=float, default=5.0, help="ms to wait for a batch to fill")
+    parser.add_argument('--max-queue', type=int, default=512, help="queued or running FIRs before answering 429")
+    parser.add_argument('--timeout', type=float, default=30.0, help="seconds a request may wait before 503")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log every request")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    service = AnalysisService(args.dataset, workers=args.workers, max_batch=args.max_batch,
+                              batch_window=args.batch_window / 1000, max_queue=args.max_queue)
+    print(f"Starting {service.workers} workers...", file=sys.stderr)
+    try:
+        service.start()
+    except ServiceUnavailable as e:
+        print(f"Could not load the IPC dataset: {e}", file=sys.stderr)
+        service.close()
+        return 1
+
+    server = AnalysisServer((args.host, args.port), service, request_timeout=args.timeout,
+                            verbose=args.verbose)
+    print(f"FIR analysis service on {server.url}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
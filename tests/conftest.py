@@ -0,0 +1,17 @@
+"""Shared fixtures; also puts the repository root on sys.path for the tests."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import synthetic  # noqa: E402
+from fir_core import SectionIndex  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def index():
+    """A 300-section synthetic dataset, shared by every test"""
+    return SectionIndex(synthetic.ipc_dataframe(300, seed=1))
@@ -0,0 +1,24 @@
+"""KeywordAutomaton substring and whole-word matching."""
+
+from fir_core import classify_sections
+from fir_core.automaton import KeywordAutomaton
+
+
+def test_substring_hits():
+    automaton = KeywordAutomaton(['he', 'she', 'his', 'hers'])
+    assert sorted(automaton.iter_hits('ushers')) == [(1, 4, 'she'), (2, 4, 'he'), (2, 6, 'hers')]
+    assert automaton.find('ushers') == {'he', 'she', 'hers'}
+
+
+def test_whole_words_skip_embedded_keywords():
+    automaton = KeywordAutomaton(['kill', 'rape', '302'], whole_words=True)
+    assert automaton.find("a skill with grape juice, section 3021") == set()
+    assert automaton.find("kill (rape) u/s 302.") == {'kill', 'rape', '302'}
+
+
+def test_classifier_ignores_embedded_keywords():
+    section = {'section': '999', 'title': 'Skilled grape farming', 'description': 'Grapes and skills.',
+               'score': 10, 'match_type': 'Keyword'}
+    result = classify_sections([section])
+    assert result['severity'] == 'Low' and result['priority'] == 'Normal'
+    assert result['crimeTypes'] == ['Skilled grape farming']
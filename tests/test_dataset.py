@@ -0,0 +1,52 @@
+"""load_index serves the compiled artifact, and recompiles only when the CSV changed."""
+
+import os
+
+import pytest
+
+from benchmarks import synthetic
+from fir_core import dataset, load_index
+from fir_core.dataset import compile_dataset
+
+
+def test_artifact_without_csv(tmp_path):
+    csv_path = synthetic.write_ipc_csv(str(tmp_path / 'ipc.csv'), 50, seed=2)
+    artifact = str(tmp_path / 'ipc.idx')
+    fingerprint = compile_dataset(csv_path, artifact).fingerprint
+    os.remove(csv_path)
+    assert load_index(csv_path, artifact).fingerprint == fingerprint
+
+
+def test_recompiles_changed_csv(tmp_path):
+    csv_path = synthetic.write_ipc_csv(str(tmp_path / 'ipc.csv'), 50, seed=2)
+    artifact = str(tmp_path / 'ipc.idx')
+    before = compile_dataset(csv_path, artifact).fingerprint
+    synthetic.write_ipc_csv(csv_path, 60, seed=3)
+    assert load_index(csv_path, artifact).fingerprint != before
+
+
+def test_shared_artifact_never_serves_another_dataset(tmp_path):
+    artifact = str(tmp_path / 'shared.idx')
+    first = synthetic.write_ipc_csv(str(tmp_path / 'first.csv'), 50, seed=2)
+    second = synthetic.write_ipc_csv(str(tmp_path / 'second.csv'), 60, seed=3)
+    first_fingerprint = compile_dataset(first, artifact).fingerprint
+
+    expected = compile_dataset(second, str(tmp_path / 'second.idx')).fingerprint
+    assert load_index(second, artifact).fingerprint == expected
+
+    # The artifact now holds the second dataset; a missing first CSV is an error
+    os.remove(first)
+    with pytest.raises(FileNotFoundError):
+        load_index(first, artifact)
+    assert first_fingerprint != expected
+
+
+def test_moved_csv_reuses_artifact(tmp_path, monkeypatch):
+    csv_path = synthetic.write_ipc_csv(str(tmp_path / 'ipc.csv'), 50, seed=2)
+    artifact = str(tmp_path / 'ipc.idx')
+    fingerprint = compile_dataset(csv_path, artifact).fingerprint
+    moved = str(tmp_path / 'moved.csv')
+    os.rename(csv_path, moved)
+
+    monkeypatch.setattr(dataset, 'compile_dataset', None)  # must not recompile
+    assert load_index(moved, artifact).fingerprint == fingerprint
@@ -0,0 +1,19 @@
+"""FuzzyCorrector repairs OCR slips without rewriting real words."""
+
+import pytest
+
+from fir_core.fuzzy import FuzzyCorrector
+
+
+@pytest.fixture(scope='module')
+def corrector(index):
+    return FuzzyCorrector(index)
+
+
+def test_repairs_ocr_slips(corrector):
+    assert corrector.correct("Sectlon 3O2 1PC, murdr u/s 42O") == "section 302 ipc, murder u/s 420"
+
+
+def test_keeps_real_words(corrector):
+    text = "he stole the bag and threatened the victim at night"
+    assert corrector.correct(text) == text
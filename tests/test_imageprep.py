@@ -0,0 +1,42 @@
+"""prepare_image keeps every tile under max_bytes."""
+
+import io
+import random
+
+import pytest
+
+from fir_core import imageprep
+from fir_core.imageprep import pillow_available, prepare_image
+from fir_core.ocr import OcrError, prepare_for_ocr
+
+pytestmark = pytest.mark.skipif(not pillow_available(), reason="Pillow not installed")
+
+
+def noisy_scan(width=1600, height=2200, seed=0):
+    """A page of random speckle: the worst case for both JPEG and PNG"""
+    from PIL import Image
+
+    rng = random.Random(seed)
+    image = Image.frombytes('L', (width, height), bytes(rng.getrandbits(8) for _ in range(width * height)))
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize('mode', ['gray', 'binary'])
+def test_tiles_fit_max_bytes(mode):
+    max_bytes = 200 * 1024
+    tiles, report = prepare_image(noisy_scan(), 'scan.png', mode=mode, max_bytes=max_bytes)
+    assert all(len(blob) <= max_bytes for _, blob in tiles)
+    assert report['bytes_out'] == sum(len(blob) for _, blob in tiles)
+    assert report['over_budget'] == 0
+
+
+def test_over_budget_narrow_scan_is_not_uploaded(monkeypatch):
+    # Too narrow to shrink further, still over the limit
+    monkeypatch.setattr(imageprep, 'MAX_UPLOAD_BYTES', 50 * 1024)
+    data = noisy_scan(width=590, height=800)
+    tiles, report = prepare_image(data, 'scan.png', max_bytes=50 * 1024)
+    assert report['over_budget'] == 1
+    with pytest.raises(OcrError, match="upload limit"):
+        prepare_for_ocr('scan.png', data)
@@ -0,0 +1,68 @@
+"""IncrementalAnalysis must give analyze_fir_logic's results after any edit."""
+
+import random
+
+import pytest
+
+from fir_core import IncrementalAnalysis, analyze_fir_logic
+
+# Short clauses keep many segments to one or two tokens, so the tail carried
+# from one segment into the next often spans several of them
+PIECES = ('cheating, ', '420 IPC, ', 'u/s 302 ', 'murder. ', 'theft, ', 'Sec. ', '379\n', 'a, ', 'b ',
+          'robbery ', 'under section ', '392, ', 'kidnapping ', 'x', ' ', ', ', '\n', 'dacoity 395 ')
+
+
+def edit(rng, text):
+    """One random insert, delete or move"""
+    pos = rng.randrange(len(text) + 1)
+    roll = rng.random()
+    if roll < 0.45 or not text:
+        return text[:pos] + rng.choice(PIECES) + text[pos:]
+    if roll < 0.8:
+        return text[:pos] + text[pos + rng.randrange(1, 30):]
+    start = rng.randrange(len(text))
+    moved = text[start:start + rng.randrange(1, 40)]
+    rest = text[:start] + text[start + len(moved):]
+    pos = rng.randrange(len(rest) + 1)
+    return rest[:pos] + moved + rest[pos:]
+
+
+def sections(results):
+    return [(m['section'], m['score'], m['match_type']) for m in results['ipcSections']]
+
+
+@pytest.mark.parametrize('fuzzy', [False, True])
+@pytest.mark.parametrize('seed', range(6))
+def test_matches_full_analysis_after_random_edits(index, fuzzy, seed):
+    rng = random.Random(seed)
+    live = IncrementalAnalysis(index, fuzzy)
+    text = "".join(rng.choice(PIECES) for _ in range(40))
+    form_data = None
+    for _ in range(150):
+        roll = rng.random()
+        if roll < 0.6:
+            text = edit(rng, text)
+        elif roll < 0.9:
+            form_data = dict(form_data or {'complainantName': 'R. Kumar', 'accusedName': 'Unknown'})
+            field = rng.choice(('complainantName', 'accusedName', 'incidentLocation'))
+            form_data[field] = edit(rng, form_data.get(field, ""))
+        else:
+            form_data = None
+        # The Create tab repeats the narrative in the form data
+        current = dict(form_data, incidentDescription=text) if form_data else None
+
+        expected = analyze_fir_logic(text, current, index=index, fuzzy=fuzzy)
+        results = live.update(text, current)
+        assert sections(results) == sections(expected)
+        assert results['ipcSections'] == expected['ipcSections']
+        assert (results['severity'], results['priority']) == (expected['severity'], expected['priority'])
+        assert results['extractedInfo'] == expected['extractedInfo']
+
+
+def test_deleted_clause_with_earlier_edit(index):
+    live = IncrementalAnalysis(index)
+    text = "a, b, x, the accused, cheating, 420 IPC"
+    assert '420' in [m['section'] for m in live.update(text)['ipcSections']]
+    # Change an early segment and drop the citation in the same update
+    text = "a, c, x, the accused"
+    assert live.update(text)['ipcSections'] == analyze_fir_logic(text, index=index)['ipcSections']
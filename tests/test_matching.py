@@ -0,0 +1,33 @@
+"""SectionMatcher must give find_matching_sections' results however a FIR is chunked."""
+
+import pytest
+
+from fir_core import SectionMatcher, find_matching_sections
+
+TEXT = ("The accused committed theft, u/s 379 IPC, and cheating under Section 420.\n"
+        "Sec. 302 r/w 34 ipc: murder of the victim; kidnapping 363 IPC and robbery 392\n"
+        "on 12 March 2024 near house no 3 at 02:30 hrs")
+
+
+def sections(matches):
+    return [(m['section'], m['score'], m['match_type']) for m in matches]
+
+
+@pytest.mark.parametrize('fuzzy', [False, True])
+def test_every_split_offset(index, fuzzy):
+    expected = sections(find_matching_sections(TEXT, None, index, fuzzy))
+    assert expected
+    for offset in range(len(TEXT) + 1):
+        matcher = SectionMatcher(index, fuzzy)
+        matcher.feed(TEXT[:offset]).feed(TEXT[offset:])
+        assert sections(matcher.results()) == expected, offset
+
+
+def test_three_chunks(index):
+    expected = sections(find_matching_sections(TEXT, None, index))
+    for first in range(0, len(TEXT), 7):
+        for second in range(first, len(TEXT), 11):
+            matcher = SectionMatcher(index)
+            for chunk in (TEXT[:first], TEXT[first:second], TEXT[second:]):
+                matcher.feed(chunk)
+            assert sections(matcher.results()) == expected, (first, second)
@@ -0,0 +1,22 @@
+"""Latency quantiles and per-request stage timing."""
+
+import pytest
+
+from fir_core.metrics import _quantile
+
+
+def test_nearest_rank_of_hundred():
+    samples = list(range(1, 101))
+    assert [_quantile(samples, q) for q in (0.5, 0.95, 0.99, 1.0)] == [50, 95, 99, 100]
+
+
+@pytest.mark.parametrize('samples, q, expected', [
+    ([], 0.5, 0.0),
+    ([7], 0.5, 7), ([7], 0.99, 7),
+    ([1, 2], 0.5, 1), ([1, 2], 0.95, 2),
+    ([1, 2, 3], 0.5, 2),
+    ([1, 2, 3, 4], 0.5, 2), ([1, 2, 3, 4], 0.75, 3), ([1, 2, 3, 4], 0.95, 4),
+    ([1, 2, 3, 4, 5], 0.5, 3), ([1, 2, 3, 4, 5], 0.9, 5),
+])
+def test_nearest_rank_small(samples, q, expected):
+    assert _quantile(samples, q) == expected
@@ -0,0 +1,19 @@
+"""Pooled OCR clients are shared per API key and language."""
+
+from fir_core import ocr
+
+
+def test_clients_reused_per_key_and_language():
+    default = ocr.get_ocr_client()
+    assert ocr.get_ocr_client(language=default.backend.language) is default
+
+    hindi = ocr.get_ocr_client(language='hin')
+    assert hindi is not default and hindi is ocr.get_ocr_client(None, 'hin')
+    assert (hindi.backend.language, hindi.backend.url) == ('hin', default.backend.url)
+    assert ocr.get_ocr_client('other-key', 'hin') is not hindi
+
+
+def test_extra_clients_bounded():
+    clients = [ocr.get_ocr_client(f"key-{i}") for i in range(ocr.MAX_EXTRA_CLIENTS + 2)]
+    assert len(ocr._extra_clients) == ocr.MAX_EXTRA_CLIENTS
+    assert clients[-1] is ocr.get_ocr_client(f"key-{len(clients) - 1}")
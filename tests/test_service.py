@@ -0,0 +1,83 @@
+"""AnalysisService admission, withdrawal and error reporting."""
+
+import multiprocessing
+import time
+
+import pytest
+
+import fir_service
+from benchmarks import synthetic
+from fir_service import AnalysisService, ServiceOverloaded, ServiceUnavailable
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    return synthetic.write_ipc_csv(str(tmp_path / 'ipc.csv'), 100, seed=1)
+
+
+@pytest.fixture
+def service(csv_path):
+    service = AnalysisService(csv_path, workers=1, max_in_flight=1, max_queue=4).start()
+    yield service
+    service.close()
+
+
+def stall(service):
+    """Hold the only batch slot so submitted FIRs stay queued"""
+    service._slots.acquire()
+
+
+def test_cancelled_request_never_runs(service):
+    stall(service)
+    futures = service.submit([("murder u/s 302", None)] * 3)
+    service.cancel(futures)
+    assert service.queue_depth() == 0
+    assert all(f.cancelled() for f in futures)
+
+    service._slots.release()
+    service.submit([("theft u/s 379", None)])[0].result(timeout=30)
+    assert service.stats()['batched_firs'] == 1
+
+
+def test_pool_rebuilt_after_worker_dies(service):
+    service.submit([("murder u/s 302", None)])[0].result(timeout=30)
+    # Kill the worker the way the OOM killer would
+    for process in list(service._pool._processes.values()):
+        process.kill()
+
+    deadline = time.perf_counter() + 30
+    while service.stats()['pool_restarts'] == 0 and time.perf_counter() < deadline:
+        try:
+            service.submit([("theft u/s 379", None)])[0].result(timeout=30)
+        except ServiceUnavailable:
+            pass
+        time.sleep(0.05)
+
+    assert service.stats()['ready'] and service.stats()['pool_restarts'] == 1
+    assert 'ipcSections' in service.submit([("theft u/s 379", None)])[0].result(timeout=30)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason="workers must inherit the patch")
+def test_running_firs_count_against_max_queue(csv_path, monkeypatch):
+    analyze = fir_service.analyze_fir_logic
+
+    def slow(*args, **kwargs):
+        time.sleep(0.2)
+        return analyze(*args, **kwargs)
+
+    monkeypatch.setattr(fir_service, 'analyze_fir_logic', slow)
+    service = AnalysisService(csv_path, workers=1, max_batch=4, max_queue=4).start()
+    try:
+        futures = service.submit([("murder u/s 302", None)] * 4)
+        deadline = time.perf_counter() + 10
+        while service.stats()['in_flight_firs'] < 4 and time.perf_counter() < deadline:
+            time.sleep(0.01)
+        assert service.queue_depth() == 0
+        with pytest.raises(ServiceOverloaded):
+            service.submit([("theft u/s 379", None)])
+        for future in futures:
+            future.result(timeout=30)
+        assert service.stats()['in_flight_firs'] == 0
+        service.submit([("theft u/s 379", None)])[0].result(timeout=30)
+    finally:
+        service.close()